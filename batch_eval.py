@@ -0,0 +1,94 @@
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from pattern_table import (PATTERN_NAMES, PATTERN_TABLES, RUN_BACK, RUN_FORWARD,
+                           OFF_BOARD, WINDOW_CELLS, WINDOW_CENTER)
+
+# 9マス窓の各マスの重み（窓コード = Σ digit * 4^j）
+_WINDOW_POWERS = 4 ** np.arange(WINDOW_CELLS, dtype=np.int64)
+_RUN_BACK = [None] + [np.frombuffer(RUN_BACK[p], dtype=np.uint8) for p in (1, 2)]
+_RUN_FORWARD = [None] + [np.frombuffer(RUN_FORWARD[p], dtype=np.uint8) for p in (1, 2)]
+
+
+def _direction_codes(boards):
+    """(N, S, S) の盤面から4方向の窓コード (4, N, S, S) を求める"""
+    pad = WINDOW_CENTER
+    padded = np.pad(boards, ((0, 0), (pad, pad), (pad, pad)), constant_values=OFF_BOARD)
+    # windows[n, r, c] は (r, c) を中心とする 9x9 の領域（コピーなしのビュー）
+    windows = sliding_window_view(padded, (WINDOW_CELLS, WINDOW_CELLS), axis=(1, 2))
+    lines = (
+        windows[..., WINDOW_CENTER, :],                                   # 横 (0, 1)
+        windows[..., :, WINDOW_CENTER],                                   # 縦 (1, 0)
+        np.diagonal(windows, axis1=-2, axis2=-1),                         # 斜め (1, 1)
+        np.diagonal(windows[..., :, ::-1], axis1=-2, axis2=-1),           # 逆斜め (1, -1)
+    )
+    return [line @ _WINDOW_POWERS for line in lines]
+
+
+def _candidate_mask(boards, radius):
+    """get_candidate_moves と同じ候補手のマスク"""
+    occupied = boards != 0
+    padded = np.pad(occupied, ((0, 0), (radius, radius), (radius, radius)))
+    size = 2 * radius + 1
+    near = sliding_window_view(padded, (size, size), axis=(1, 2)).any(axis=(-2, -1))
+    mask = near & ~occupied
+    # 候補が無い盤面（空の盤面など）は中央だけを候補にする
+    center = boards.shape[1] // 2
+    empty_boards = ~mask.any(axis=(1, 2))
+    mask[empty_boards, center, center] = ~occupied[empty_boards, center, center]
+    return mask
+
+
+def evaluate_boards(boards, weights, for_player, candidate_radius=2):
+    """evaluate_board_enhanced を全マス一括で計算する
+
+    boards は (S, S) か (N, S, S)。戻り値の形も入力に合わせる。
+    同じ weights なら GomokuAnalyzer.evaluate_board_enhanced と同じ値になる。
+    """
+    boards = np.asarray(boards, dtype=np.int64)
+    single = boards.ndim == 2
+    if single:
+        boards = boards[np.newaxis]
+    size = boards.shape[1]
+    opponent = 3 - for_player
+
+    codes = _direction_codes(boards)
+    class_weights = np.array([0 if name is None else weights[name] for name in PATTERN_NAMES],
+                             dtype=float)
+
+    # 攻撃スコアとフォーク判定（方向ごとの順に足して scalar 版と丸めを揃える）
+    attack = np.zeros(boards.shape)
+    fours = np.zeros(boards.shape, dtype=np.int64)
+    threes = np.zeros(boards.shape, dtype=np.int64)
+    defense = np.zeros(boards.shape)
+    continuity = np.zeros(boards.shape)
+    for code in codes:
+        score = class_weights[PATTERN_TABLES[for_player][code]]
+        attack += score
+        is_four = score >= weights['open_four']
+        fours += is_four
+        threes += ~is_four & (score >= weights['open_three'])
+
+        opp_score = class_weights[PATTERN_TABLES[opponent][code]]
+        defense += np.where(opp_score >= 10000, 50000,
+                            np.where(opp_score >= 1000, 2000,
+                                     np.where(opp_score >= 200, 300, 0)))
+
+        count = (np.minimum(_RUN_FORWARD[for_player][code], 3)
+                 + np.minimum(_RUN_BACK[for_player][code], 3)).astype(np.int64)
+        continuity += np.where(count >= 2, 100 * count, 0)
+
+    fork = np.zeros(boards.shape)
+    fork += np.where(fours >= 2, weights['fork_44'], 0)
+    fork += np.where((fours >= 1) & (threes >= 1), weights['fork_43'], 0)
+    fork += np.where(threes >= 2, weights['fork_33'], 0)
+    attack += fork
+
+    center = size // 2
+    rows, cols = np.indices((size, size))
+    distance = np.abs(rows - center) + np.abs(cols - center)
+    center_bonus = np.maximum(0, 10 - distance) * weights.get('center_bonus', 100)
+
+    total = attack * 1.0 + defense * weights['defense_weight'] + center_bonus + continuity
+    scores = np.where(_candidate_mask(boards, candidate_radius), total, 0.0)
+    return scores[0] if single else scores
@@ -0,0 +1,67 @@
+class BitBoard:
+    """手番ごとのビットボード（Python の多倍長整数）で盤面を表す"""
+
+    def __init__(self, size=15):
+        self.size = size
+        # 各行の右端に番兵列を1つ置き、横・斜めのシフトで次の行へ回り込まないようにする
+        self.stride = size + 1
+        # 横・縦・斜め・逆斜め方向のシフト量
+        self.shifts = (1, self.stride, self.stride + 1, self.stride - 1)
+        self.stones = [0, 0, 0]
+
+        # _five_masks[bit][d] = そのマスを含む五連の始点になりうるビットの集合
+        self._five_masks = []
+        for bit in range(size * self.stride):
+            masks = []
+            for shift in self.shifts:
+                mask = 0
+                for k in range(5):
+                    start = bit - k * shift
+                    if start >= 0:
+                        mask |= 1 << start
+                masks.append(mask)
+            self._five_masks.append(masks)
+
+    def place(self, r, c, player):
+        self.stones[player] |= 1 << (r * self.stride + c)
+
+    def remove(self, r, c):
+        bit = ~(1 << (r * self.stride + c))
+        self.stones[1] &= bit
+        self.stones[2] &= bit
+
+    def get(self, r, c):
+        bit = 1 << (r * self.stride + c)
+        if self.stones[1] & bit:
+            return 1
+        if self.stones[2] & bit:
+            return 2
+        return 0
+
+    def occupancy(self):
+        return self.stones[1] | self.stones[2]
+
+    def _five_starts(self, bits, shift):
+        """shift 方向に5連続するビット列の始点を返す"""
+        bits &= bits >> shift
+        bits &= bits >> (2 * shift)
+        bits &= bits >> shift
+        return bits
+
+    def has_five(self, player):
+        """盤面のどこかに player の五連があるか"""
+        bits = self.stones[player]
+        for shift in self.shifts:
+            if self._five_starts(bits, shift):
+                return True
+        return False
+
+    def is_five_through(self, r, c, player):
+        """(r, c) に player の石があるものとして、そのマスを通る五連ができるか"""
+        bit = r * self.stride + c
+        bits = self.stones[player] | (1 << bit)
+        masks = self._five_masks[bit]
+        for d, shift in enumerate(self.shifts):
+            if self._five_starts(bits, shift) & masks[d]:
+                return True
+        return False
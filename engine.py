@@ -1,635 +1,1489 @@
-import numpy as np
-import random
-import time
-
-class GomokuAnalyzer:
-    def __init__(self, size=15):
-        self.size = size
-        self.board = np.zeros((size, size), dtype=int)
-        self.current_player = 1
-        self.move_history = []
-        # GAで調整したいスコアを辞書にまとめる
-        self.weights = {
-            'five': 100000,
-            'open_four': 12000,
-            'dead_four': 5000,
-            'open_three': 1500,
-            'dead_three': 200,
-            'open_two': 50,
-            'defense_weight': 1.2,  # 防御の重要度
-            'fork_44': 15000, 
-            'fork_43': 8000, 
-            'fork_33': 3000, 
-            'center_bonus': 100
-        }
-
-    def put_stone(self, r, c, player):
-        if 0 <= r < self.size and 0 <= c < self.size and self.board[r][c] == 0:
-            self.board[r][c] = player
-            self.move_history.append((r, c, player))
-            return True
-        return False
-
-    def is_within_board(self, r, c):
-        """盤面内かどうかを判定"""
-        return 0 <= r < self.size and 0 <= c < self.size
-    
-    def get_line_openness(self, r, c, dr, dc, player):
-        """両端の開きを正確に判定"""
-        # 正方向の連続石を数える
-        pos_count = 0
-        for i in range(1, 6):
-            nr, nc = r + dr * i, c + dc * i
-            if not self.is_within_board(nr, nc):
-                break
-            if self.board[nr][nc] == player:
-                pos_count += 1
-            elif self.board[nr][nc] == 0:
-                break
-            else:
-                break
-        
-        # 負方向の連続石を数える
-        neg_count = 0
-        for i in range(1, 6):
-            nr, nc = r - dr * i, c - dc * i
-            if not self.is_within_board(nr, nc):
-                break
-            if self.board[nr][nc] == player:
-                neg_count += 1
-            elif self.board[nr][nc] == 0:
-                break
-            else:
-                break
-        
-        # 両端の空き判定
-        front_open = False
-        back_open = False
-        
-        # 正方向の空き判定（連続石の次のマス）
-        next_pos = (r + dr * (pos_count + 1), c + dc * (pos_count + 1))
-        if self.is_within_board(*next_pos) and self.board[next_pos] == 0:
-            front_open = True
-        
-        # 負方向の空き判定（連続石の前のマス）
-        next_neg = (r - dr * (neg_count + 1), c - dc * (neg_count + 1))
-        if self.is_within_board(*next_neg) and self.board[next_neg] == 0:
-            back_open = True
-        
-        return front_open, back_open
-    
-    def detect_urgent_threats(self, player):
-        """緊急な脅威を検出（活四・活三など）。活三(>=1000)以上を返す"""
-        threats = []
-        candidate_moves = self.get_candidate_moves()
-        
-        for r, c in candidate_moves:
-            if self.board[r][c] != 0:
-                continue
-            
-            directions = [(0, 1), (1, 0), (1, 1), (1, -1)]
-            max_score = 0
-            for dr, dc in directions:
-                score = self.evaluate_pattern(r, c, dr, dc, player)
-                if score > max_score:
-                    max_score = score
-            
-            # 活三(>=1000)以上を緊急脅威として扱う（活四=12000, 五連=100000等）
-            if max_score >= 1000:
-                threats.append((r, c, max_score))
-        
-        # スコア順（降順）にして返す
-        threats.sort(key=lambda x: -x[2])
-        return threats
-
-
-    def evaluate_pattern(self, r, c, dr, dc, player):
-        """1方向のパターンを文字列マッチングで詳細に評価"""
-        # 1. 注目しているマスの前後4マス、計9マスの状態を取得
-        line = []
-        for i in range(-4, 5):
-            nr, nc = r + dr * i, c + dc * i
-            if self.is_within_board(nr, nc):
-                # (r, c) の位置にはこれから石を置くので、player の石として扱う
-                val = self.board[nr][nc] if i != 0 else player
-                line.append(val)
-            else:
-                line.append(-1)  # 盤外は -1
-                
-        # 文字列に変換（例: "0110110"）
-        # 0:空き, 1:黒, 2:白, -1:盤外(X)
-        s = "".join([str(x) if x != -1 else "X" for x in line])
-        p = str(player)
-        o = "0"
-
-        # --- 2. パターンマッチング（強い順に判定） ---
-        # 【五連】
-        if p * 5 in s:
-            return self.weights['five']
-
-        # 【活四】 . ● ● ● ● .
-        if f"{o}{p*4}{o}" in s:
-            return self.weights['open_four']
-
-        # 【眠四】 (トビ四を含む)
-        # 例: ● ● . ● ●  や  ● . ● ● ● など
-        dead_four_patterns = [
-            p*4,          # ●●●●
-            f"{p}{o}{p*3}", # ●.●●●
-            f"{p*3}{o}{p}", # ●●●.●
-            f"{p*2}{o}{p*2}" # ●●.●●
-        ]
-        if any(pat in s for pat in dead_four_patterns):
-            # 両端のどちらかが空いていれば眠四 (活四は上で除外済み)
-            return self.weights['dead_four']
-
-        # 【活三】 (トビ活三を含む)
-        # 通常の活三: .●●●.
-        # トビ三の例: .●.●●. や .●●.●. など
-        open_three_patterns = [
-            f"{o}{p*3}{o}",      # .●●●.
-            f"{o}{p}{o}{p*2}{o}",  # .●.●●.
-            f"{o}{p*2}{o}{p}{o}",  # .●●.●.
-            # さらにトビ三のバリエーション (7マス中に3つの石が2グループ)
-            f"{o}{p}{o}{p}{o}{p}{o}",  # .●.●.●. (飛び三連続の一種)
-            f"{o}{p*2}{o}{p}{o}{p}{o}", # .●●.●.●. (やや長いが部分一致で検出)
-        ]
-        if any(pat in s for pat in open_three_patterns):
-            return self.weights['open_three']
-
-        # 【眠三】
-        # 片方が塞がった三連 (例えば先頭が盤外や相手石)
-        if p * 3 in s:
-            return self.weights['dead_three']
-
-        # 【活二】
-        if f"{o}{p*2}{o}" in s:
-            return self.weights['open_two']
-
-        return 0
-
-    def detect_forks(self, r, c, player):
-        """三三、四三などのフォークを検出"""
-        directions = [(0, 1), (1, 0), (1, 1), (1, -1)]
-        
-        # 各方向の脅しの強さを評価
-        threats = []
-        for dr, dc in directions:
-            score = self.evaluate_pattern(r, c, dr, dc, player)
-            
-            # ここも本当は weights を参照するとより進化しやすくなります
-            if score >= self.weights['open_four']: # 10000の代わりに
-                threats.append('four')
-            elif score >= self.weights['open_three']: # 1000の代わりに
-                threats.append('three')
-            elif score >= self.weights['dead_three']: # 200の代わりに
-                threats.append('half-three')
-        
-        # フォークのボーナス計算
-        bonus = 0
-        three_count = threats.count('three')
-        four_count = threats.count('four')
-        
-        # --- 直接の数字を self.weights の項目名に変更 ---
-        if four_count >= 2:
-            bonus += self.weights['fork_44']  # 15000の代わり
-        if four_count >= 1 and three_count >= 1:
-            bonus += self.weights['fork_43']  # 8000の代わり
-        if three_count >= 2:
-            bonus += self.weights['fork_33']  # 3000の代わり
-        
-        return bonus
-
-    def evaluate_board_enhanced(self, for_player=None):
-        """改良版評価関数 - メインで使用する"""
-        if for_player is None:
-            for_player = self.current_player
-        
-        scores = np.zeros((self.size, self.size))
-        directions = [(0, 1), (1, 0), (1, 1), (1, -1)]
-        
-        # 候補手の限定（既存の石から2マス以内）
-        candidate_moves = self.get_candidate_moves()
-        
-        for r, c in candidate_moves:
-            if self.board[r][c] != 0:
-                continue
-            
-            # 攻撃スコア（自分の石の評価）
-            attack_score = 0
-            for dr, dc in directions:
-                attack_score += self.evaluate_pattern(r, c, dr, dc, for_player)
-            
-            # フォークボーナス
-            fork_bonus = self.detect_forks(r, c, for_player)
-            attack_score += fork_bonus
-            
-            # 防御スコア（相手の石の評価を阻止する価値）
-            defense_score = 0
-            opponent = 3 - for_player
-            
-            for dr, dc in directions:
-                opp_score = self.evaluate_pattern(r, c, dr, dc, opponent)
-                # 相手の強い脅しを防ぐ価値
-                if opp_score >= 10000:  # 相手の活四を防ぐ
-                    defense_score += 50000
-                elif opp_score >= 1000:  # 相手の活三を防ぐ
-                    defense_score += 2000
-                elif opp_score >= 200:   # 相手の眠三を防ぐ
-                    defense_score += 300
-            
-            # 中央性ボーナス
-            center = self.size // 2
-            distance = abs(r - center) + abs(c - center)
-            center_bonus = max(0, 10 - distance) * self.weights.get('center_bonus', 100)
-            
-            # 既存の脅しを活かすボーナス
-            continuity_bonus = self.continuity_bonus(r, c, for_player)
-            
-            # 総合スコア（攻撃:1.0, 防御:weights['defense_weight']の重み）
-            total_score = (attack_score * 1.0 + defense_score * self.weights['defense_weight'] + 
-                          center_bonus + continuity_bonus)
-            
-            scores[r][c] = total_score
-        
-        return scores
-    
-    def get_candidate_moves(self):
-        """探索範囲を限定（石の周囲2マスのみ）"""
-        candidates = set()
-        board_size = self.size
-        
-        # すべての石の周囲を候補に追加
-        for i in range(board_size):
-            for j in range(board_size):
-                if self.board[i][j] != 0:
-                    for di in range(-2, 3):
-                        for dj in range(-2, 3):
-                            ni, nj = i + di, j + dj
-                            if 0 <= ni < board_size and 0 <= nj < board_size:
-                                if self.board[ni][nj] == 0:
-                                    candidates.add((ni, nj))
-        
-        # 空の盤面の場合、中央を候補に
-        if not candidates:
-            candidates.add((board_size//2, board_size//2))
-        
-        return list(candidates)
-    
-    def continuity_bonus(self, r, c, player):
-        """攻めの継続性ボーナス（既存の攻撃ラインを活かす手）"""
-        bonus = 0
-        directions = [(0, 1), (1, 0), (1, 1), (1, -1)]
-        
-        for dr, dc in directions:
-            # この方向に既に並んでいる自分の石の数を数える
-            count = 0
-            for i in range(1, 4):
-                nr, nc = r + dr * i, c + dc * i
-                if self.is_within_board(nr, nc) and self.board[nr][nc] == player:
-                    count += 1
-                else:
-                    break
-            for i in range(1, 4):
-                nr, nc = r - dr * i, c - dc * i
-                if self.is_within_board(nr, nc) and self.board[nr][nc] == player:
-                    count += 1
-                else:
-                    break
-            
-            if count >= 2:
-                bonus += 100 * count  # 既に並んでいる石の近くに打つボーナス
-        
-        return bonus
-        
-    def evaluate_board(self, for_player=None):
-        """従来の評価関数（後方互換性のため保持）"""
-        return self.evaluate_board_enhanced(for_player)
-
-    def check_win(self, r, c, player):
-        """勝利判定"""
-        directions = [(0, 1), (1, 0), (1, 1), (1, -1)]
-        
-        for dr, dc in directions:
-            count = 1
-            
-            # 正方向
-            for i in range(1, 5):
-                nr, nc = r + dr * i, c + dc * i
-                if 0 <= nr < self.size and 0 <= nc < self.size and self.board[nr][nc] == player:
-                    count += 1
-                else:
-                    break
-            
-            # 負方向
-            for i in range(1, 5):
-                nr, nc = r - dr * i, c - dc * i
-                if 0 <= nr < self.size and 0 <= nc < self.size and self.board[nr][nc] == player:
-                    count += 1
-                else:
-                    break
-            
-            if count >= 5:
-                return True
-        
-        return False
-    
-    def get_best_move(self, depth_limit=None):
-        """最善手探索（反復深化付き＋急所検出）"""
-        # 【最優先：相手の即勝ち手を防ぐ】
-        player = self.current_player
-        opponent = 3 - self.current_player
-        candidate_moves = self.get_candidate_moves()
-        
-        for r, c in candidate_moves:
-            self.board[r][c] = opponent
-            if self.check_win(r, c, opponent):
-                self.board[r][c] = 0
-                #print(f"  → 防御急所！({r}, {c}) に着手してブロック")
-                return (r, c)
-            self.board[r][c] = 0
-        
-        # 【自分の即勝ち手があれば指す】
-        for r, c in candidate_moves:
-            self.board[r][c] = self.current_player
-            if self.check_win(r, c, self.current_player):
-                self.board[r][c] = 0
-                #print(f"  → 勝利急所！({r}, {c}) に着手して勝利")
-                return (r, c)
-            self.board[r][c] = 0
-
-        # 【追加】相手の活三・活四などの緊急脅威を検出してブロック
-        urgent = self.detect_urgent_threats(opponent)
-        if urgent:
-            ur = urgent[0]
-            #print(f"  → 防御急所(urgent)！({ur[0]}, {ur[1]}) に着手して阻止 (score={ur[2]})")
-            return (ur[0], ur[1])
-        
-         # 【追加】自分の活三・活四を優先して攻める
-        my_urgent = self.detect_urgent_threats(player)
-        if my_urgent:
-            ur = my_urgent[0]
-            #print(f"  → 攻撃急所！({ur[0]}, {ur[1]}) に着手 (score={ur[2]})")
-            return (ur[0], ur[1])
-
-        # 最初の数手は静的評価
-        if len(self.move_history) < 3:
-            return self.get_best_move_static()
-        
-        # 反復深化探索（時間制限付き）
-        start_time = time.time()
-        time_limit = 1.0  # 1秒制限
-        best_move = None
-        best_score = -float('inf')
-        
-        # 深さ1から徐々に深く
-        start_depth = 1
-        end_depth = 4
-        
-        if depth_limit is not None:
-            start_depth = depth_limit
-            end_depth = depth_limit + 1
-            time_limit = 100.0  # 指定がある時は時間制限を実質無効にする
-        else:
-            time_limit = 1.0    # 通常プレイ時は1秒制限
-
-        # 反復深化探索
-        for depth in range(start_depth, end_depth):
-            if time.time() - start_time > time_limit:
-                break
-            
-            moves = self.get_ordered_moves(self.current_player)
-            current_best = None
-            current_score = -float('inf')
-            
-            for r, c in moves:
-                if time.time() - start_time > time_limit:
-                    break
-                
-                self.board[r][c] = self.current_player
-                score = self.minimax(depth - 1, -float('inf'), float('inf'), False, (r, c))
-                self.board[r][c] = 0
-                
-                if score > current_score:
-                    current_score = score
-                    current_best = (r, c)
-            
-            if current_best and current_score > best_score:
-                best_move = current_best
-                best_score = current_score
-        
-        return best_move if best_move else self.get_best_move_static()
-
-    def get_best_move_static(self):
-        """静的評価関数のみを使用（急所検出付き）"""
-        candidate_moves = self.get_candidate_moves()
-        
-        # 【最優先：相手の即勝ち手を防ぐ】
-        opponent = 3 - self.current_player
-        for r, c in candidate_moves:
-            self.board[r][c] = opponent
-            if self.check_win(r, c, opponent):
-                self.board[r][c] = 0
-                #print(f"  → 防御急所（static）！({r}, {c}) に着手してブロック")
-                return (r, c)
-            self.board[r][c] = 0
-        
-        # 【自分の即勝ち手があれば指す】
-        for r, c in candidate_moves:
-            self.board[r][c] = self.current_player
-            if self.check_win(r, c, self.current_player):
-                self.board[r][c] = 0
-                #print(f"  → 勝利急所（static）！({r}, {c}) に着手して勝利")
-                return (r, c)
-            self.board[r][c] = 0
-        
-        # 通常の評価で決める
-        scores = self.evaluate_board_enhanced(self.current_player)
-        max_score = -float('inf')
-        best_moves = []
-        
-        for r, c in candidate_moves:
-            score = scores[r][c]
-            if score > max_score:
-                max_score = score
-                best_moves = [(r, c)]
-            elif abs(score - max_score) < 1e-9:
-                best_moves.append((r, c))
-        
-        if best_moves:
-            return random.choice(best_moves)
-        
-        # フォールバック
-        center = self.size // 2
-        for dr in range(self.size):
-            for dc in range(self.size):
-                r = (center + dr) % self.size
-                c = (center + dc) % self.size
-                if self.board[r][c] == 0:
-                    return r, c
-        
-        return None
-
-    def get_game_state(self):
-        """ゲーム状態を文字列で返す"""
-        state = []
-        for r in range(self.size):
-            row = []
-            for c in range(self.size):
-                if self.board[r][c] == 0:
-                    row.append('.')
-                elif self.board[r][c] == 1:
-                    row.append('B')
-                else:
-                    row.append('W')
-            state.append(''.join(row))
-        return '\n'.join(state)
-    
-    def minimax(self, depth, alpha, beta, maximizing_player, last_move=None, ai_player=None):
-        """αβ枝切り付きミニマックス法（修正版）"""
-        if ai_player is None:
-            ai_player = self.current_player
-        
-        # 勝利判定（シンプル化）
-        if last_move:
-            r, c = last_move
-            moving_player = ai_player if maximizing_player else (3 - ai_player)
-            if self.check_win(r, c, moving_player):
-                return 1000000 if moving_player == ai_player else -1000000
-        
-        # 深さ0で評価
-        if depth == 0:
-            return self.quick_evaluate(ai_player)
-        
-        # 手の候補を評価値順にソート
-        moves = self.get_ordered_moves(ai_player if maximizing_player else (3 - ai_player))
-        
-        if maximizing_player:
-            val = -float('inf')
-            for r, c in moves:
-                self.board[r][c] = ai_player
-                res = self.minimax(depth - 1, alpha, beta, False, (r, c), ai_player)
-                self.board[r][c] = 0
-                val = max(val, res)
-                alpha = max(alpha, val)
-                if beta <= alpha:
-                    break
-            return val
-        else:
-            val = float('inf')
-            opponent = 3 - ai_player
-            for r, c in moves:
-                self.board[r][c] = opponent
-                res = self.minimax(depth - 1, alpha, beta, True, (r, c), ai_player)
-                self.board[r][c] = 0
-                val = min(val, res)
-                beta = min(beta, val)
-                if beta <= alpha:
-                    break
-            return val
-    
-    def get_ordered_moves(self, player):
-        """評価値の高い順に手をソート（αβ枝刈りの効率化）"""
-        moves = self.get_candidate_moves()
-        if not moves:
-            return []
-        
-        scored_moves = []
-        for r, c in moves:
-            if self.board[r][c] == 0:
-                self.board[r][c] = player
-                score = self.quick_positional_score(r, c, player)
-                self.board[r][c] = 0
-                scored_moves.append((-score, r, c))
-        
-        scored_moves.sort()
-        return [(r, c) for _, r, c in scored_moves]
-
-    def quick_positional_score(self, r, c, player):
-        """手の簡易位置評価（ソート用）"""
-        score = 0
-        
-        # 中央に近いほど高評価
-        center = self.size // 2
-        distance = abs(r - center) + abs(c - center)
-        score += max(0, 10 - distance) * 10
-        
-        # 既存の石の近くは高評価
-        for dr in range(-2, 3):
-            for dc in range(-2, 3):
-                nr, nc = r + dr, c + dc
-                if 0 <= nr < self.size and 0 <= nc < self.size:
-                    if self.board[nr][nc] == player:
-                        score += 50
-                    elif self.board[nr][nc] == (3 - player):
-                        score += 30
-        
-        return score
-    
-    def quick_evaluate(self, player):
-        """軽量評価関数（ミニマックス用）"""
-        if self.check_win_anywhere(player):
-            return 100000
-        if self.check_win_anywhere(3 - player):
-            return -100000
-        
-        score = 0
-        opponent = 3 - player
-        
-        # 簡易パターン評価
-        for r in range(self.size):
-            for c in range(self.size):
-                if self.board[r][c] == player:
-                    score += self.evaluate_single_stone(r, c, player)
-                elif self.board[r][c] == opponent:
-                    score -= self.evaluate_single_stone(r, c, opponent)
-        
-        return score
-
-    def evaluate_single_stone(self, r, c, player):
-        """単一の石の影響力を評価"""
-        if self.board[r][c] != player:
-            return 0
-        
-        directions = [(0, 1), (1, 0), (1, 1), (1, -1)]
-        stone_value = 0
-        
-        for dr, dc in directions:
-            count = 1
-            for i in range(1, 5):
-                nr, nc = r + dr * i, c + dc * i
-                if not self.is_within_board(nr, nc):
-                    break
-                if self.board[nr][nc] == player:
-                    count += 1
-                else:
-                    break
-            
-            for i in range(1, 5):
-                nr, nc = r - dr * i, c - dc * i
-                if not self.is_within_board(nr, nc):
-                    break
-                if self.board[nr][nc] == player:
-                    count += 1
-                else:
-                    break
-            
-            if count >= 5:
-                stone_value += 10000
-            elif count == 4:
-                stone_value += 1000
-            elif count == 3:
-                stone_value += 100
-            elif count == 2:
-                stone_value += 10
-        
-        return stone_value
-
-    def check_win_anywhere(self, player):
-        """盤面全体で勝利判定"""
-        for r in range(self.size):
-            for c in range(self.size):
-                if self.board[r][c] == player:
-                    if self.check_win(r, c, player):
-                        return True
-        return False
\ No newline at end of file
+import heapq
+import numpy as np
+import random
+from batch_eval import evaluate_boards
+from bitboard import BitBoard
+from parallel_search import ParallelSearch
+from search_control import SearchAborted, SearchController
+from threat_search import MODE_VCF, MODE_VCT, ThreatSpaceSearch
+from transposition import (BOUND_EXACT, BOUND_LOWER, BOUND_UPPER, TranspositionTable,
+                           zobrist_keys)
+from pattern_table import (PATTERN_CLASS, PATTERN_DEAD_FOUR, PATTERN_FIVE, PATTERN_NAMES,
+                           PATTERN_OPEN_FOUR, RUN_BACK, RUN_FORWARD, OFF_BOARD, WINDOW_MASK)
+
+# 4方向（横・縦・斜め・逆斜め）
+DIRECTIONS = ((0, 1), (1, 0), (1, 1), (1, -1))
+DIRECTION_INDEX = {d: i for i, d in enumerate(DIRECTIONS)}
+
+# ライン両端の盤外パディング（マス数）
+LINE_PADDING = 6
+
+# 探索中に五連ができた時の評価値
+WIN_SCORE = 1000000
+
+# 反復深化の最大深さと、通常プレイ時の1手あたりの時間（秒）
+MAX_SEARCH_DEPTH = 20
+DEFAULT_TIME_LIMIT = 1.0
+
+# 探索の設定（A/B比較用に個別に切り替えられる）
+DEFAULT_SEARCH_OPTIONS = {
+    'pvs': True,                  # 2手目以降をヌルウィンドウで読み、必要な時だけ再探索
+    'aspiration': True,           # 前の深さの評価値を中心とした窓でルートを読む
+    'aspiration_window': 200,
+    'lmr': True,                  # 順序の後ろの静かな手を1手浅く読む
+    'lmr_min_depth': 3,
+    'lmr_move_index': 3,
+    'quiescence': True,           # 深さ0で四・四止め（と三の受け）だけを読み続ける
+    'quiescence_threes': False,   # 相手の活三への受けも読むか
+    'quiescence_max_ply': 8,
+    'quiescence_max_nodes': 20000,  # 1回の get_best_move あたりの上限
+}
+
+# get_best_move 1回で脅威空間探索（VCF・VCT と手順の崩し）に使うノード数
+THREAT_SEARCH_NODES = 3000
+
+# 相手の勝ち手順を崩す手として試すマスの数（1マスごとに脅威空間探索を1回行う）
+MAX_THREAT_DEFENCES = 4
+
+# 評価値マップを退避しておく weights の数（GA の対局では2つを交互に使う）
+SCORE_MAP_STASH_SIZE = 4
+
+# 5マス窓に自分の石だけが k 個ある時の価値（五連は別途フラグで判定）
+THREAT_WINDOW_VALUES = (0, 1, 10, 100, 1000, 0)
+
+
+class GomokuAnalyzer:
+    def __init__(self, size=15, backend='array', tt_size_mb=4, candidate_radius=2,
+                 search_options=None, workers=1):
+        if backend not in ('array', 'bitboard'):
+            raise ValueError(f"unknown board backend: {backend}")
+        self.size = size
+        self.backend = backend
+        self.board = np.zeros((size, size), dtype=int)
+        # 盤面の1次元コピー（内部の高速参照用）
+        self._cells = [0] * (size * size)
+        # backend='bitboard' の時は勝利判定をビットボードで行う（候補手は差分更新の集合を使う）
+        self.bitboard = BitBoard(size) if backend == 'bitboard' else None
+        self.current_player = 1
+        self.move_history = []
+        # make_move/unmake_move 用の取り消しスタック（着手前の手番を積む）
+        self._undo_stack = []
+        # Zobristハッシュ（石の配置のみ。手番は探索側で混ぜる）
+        self._zobrist_stones, self._zobrist_side = zobrist_keys(size)
+        self.zobrist_key = 0
+        # 置換表は最初の探索時に確保する
+        self.tt_size_mb = tt_size_mb
+        self.tt = None
+        # 探索の予算管理（get_best_move の間だけ差し替える）と直近の探索結果
+        self._controller = SearchController()
+        self.search_stats = {}
+        self.search_options = dict(DEFAULT_SEARCH_OPTIONS)
+        if search_options:
+            self.search_options.update(search_options)
+        self._quiescence_nodes = 0
+        self._reset_move_ordering()
+        # 前回の探索の読み筋 (探索時の手数, [手, ...])。次の探索の最初に読む手に使う
+        self._pv = None
+        # 探索中に完了した一番深い深さの最善手（別スレッドから途中経過を見る用）
+        self.current_best = None
+        # ルート並列探索のプロセス数（1なら並列化しない）
+        self.workers = workers
+        self._parallel = None
+        # GAで調整したいスコアを辞書にまとめる
+        self.weights = {
+            'five': 100000,
+            'open_four': 12000,
+            'dead_four': 5000,
+            'open_three': 1500,
+            'dead_three': 200,
+            'open_two': 50,
+            'defense_weight': 1.2,  # 防御の重要度
+            'fork_44': 15000, 
+            'fork_43': 8000, 
+            'fork_33': 3000, 
+            'center_bonus': 100
+        }
+        self.candidate_radius = candidate_radius
+        self._init_lines()
+        self._init_candidates()
+        self._init_threat_windows()
+        self._init_score_map()
+
+    def _init_lines(self):
+        """全ライン（行・列・斜め・逆斜め）の整数エンコードを初期化"""
+        # 1マス2ビット（0:空き, 1:黒, 2:白, 3:盤外）。両端は盤外で埋めておく
+        self._lines = []
+        # _cell_lines[r * size + c] = 4方向それぞれの (ライン番号, そのマスのビット位置)
+        self._cell_lines = [[None] * len(DIRECTIONS) for _ in range(self.size * self.size)]
+        for d, (dr, dc) in enumerate(DIRECTIONS):
+            for r in range(self.size):
+                for c in range(self.size):
+                    # ラインの始点（1つ手前が盤外のマス）からだけ辿る
+                    if self.is_within_board(r - dr, c - dc):
+                        continue
+                    line_id = len(self._lines)
+                    pos = LINE_PADDING
+                    nr, nc = r, c
+                    while self.is_within_board(nr, nc):
+                        self._cell_lines[nr * self.size + nc][d] = (line_id, 2 * pos)
+                        pos += 1
+                        nr, nc = nr + dr, nc + dc
+                    value = 0
+                    for k in range(pos + LINE_PADDING):
+                        if k < LINE_PADDING or k >= pos:
+                            value |= OFF_BOARD << (2 * k)
+                    self._lines.append(value)
+        self._cell_lines = [tuple(entry) for entry in self._cell_lines]
+
+    def _init_candidates(self):
+        """候補手集合（石から candidate_radius マス以内の空きマス）を作り直す"""
+        radius = self.candidate_radius
+        cells = self.size * self.size
+        self._neighbours = []
+        for idx in range(cells):
+            r, c = divmod(idx, self.size)
+            self._neighbours.append(tuple(
+                nr * self.size + nc
+                for nr in range(r - radius, r + radius + 1)
+                for nc in range(c - radius, c + radius + 1)
+                if (nr, nc) != (r, c) and self.is_within_board(nr, nc)
+            ))
+        # _near_count[idx] = 周囲 radius マス以内にある石の数（参照カウント）
+        self._near_count = [0] * cells
+        self._candidates = set()
+        for idx in range(cells):
+            if self._cells[idx] != 0:
+                for n in self._neighbours[idx]:
+                    self._near_count[n] += 1
+        for idx in range(cells):
+            if self._cells[idx] == 0 and self._near_count[idx] > 0:
+                self._candidates.add(idx)
+
+    def _init_threat_windows(self):
+        """盤上の全5マス窓（15路で572個）と手番ごとの石数・集計値を作り直す"""
+        self._windows = []
+        cell_windows = [[] for _ in range(self.size * self.size)]
+        for dr, dc in DIRECTIONS:
+            for r in range(self.size):
+                for c in range(self.size):
+                    if not self.is_within_board(r + dr * 4, c + dc * 4):
+                        continue
+                    window_id = len(self._windows)
+                    cells = tuple((r + dr * i) * self.size + (c + dc * i) for i in range(5))
+                    self._windows.append(cells)
+                    for idx in cells:
+                        cell_windows[idx].append(window_id)
+        self._cell_windows = [tuple(w) for w in cell_windows]
+        count = len(self._windows)
+        self._window_counts = [None, [0] * count, [0] * count]
+        # 手番ごとの窓価値の合計と、五連の窓の数
+        self._threat_score = [0, 0, 0]
+        self._five_windows = [0, 0, 0]
+        # 自分の石だけが4つある窓（あと1手で五連）の集合
+        self._four_windows = [None, set(), set()]
+        # 自分の石だけが3つある窓（空きマスに打てば四）の集合
+        self._three_windows = [None, set(), set()]
+        for idx, player in enumerate(self._cells):
+            if player != 0:
+                self._add_to_windows(idx, player)
+
+    def _add_to_windows(self, idx, player):
+        """idx に player の石が増えた時の窓の差分更新"""
+        own_counts = self._window_counts[player]
+        opp_counts = self._window_counts[3 - player]
+        score = self._threat_score
+        values = THREAT_WINDOW_VALUES
+        for w in self._cell_windows[idx]:
+            own = own_counts[w]
+            opp = opp_counts[w]
+            if opp == 0:
+                score[player] += values[own + 1] - values[own]
+                if own == 2:
+                    self._three_windows[player].add(w)
+                elif own == 3:
+                    self._three_windows[player].discard(w)
+                    self._four_windows[player].add(w)
+                elif own == 4:
+                    self._four_windows[player].discard(w)
+                    self._five_windows[player] += 1
+            elif own == 0:
+                # 相手の窓が死ぬ
+                score[3 - player] -= values[opp]
+                if opp == 4:
+                    self._four_windows[3 - player].discard(w)
+                elif opp == 3:
+                    self._three_windows[3 - player].discard(w)
+            own_counts[w] = own + 1
+
+    def _remove_from_windows(self, idx, player):
+        """_add_to_windows の逆"""
+        own_counts = self._window_counts[player]
+        opp_counts = self._window_counts[3 - player]
+        score = self._threat_score
+        values = THREAT_WINDOW_VALUES
+        for w in self._cell_windows[idx]:
+            own = own_counts[w]
+            opp = opp_counts[w]
+            if opp == 0:
+                score[player] += values[own - 1] - values[own]
+                if own == 5:
+                    self._five_windows[player] -= 1
+                    self._four_windows[player].add(w)
+                elif own == 4:
+                    self._four_windows[player].discard(w)
+                    self._three_windows[player].add(w)
+                elif own == 3:
+                    self._three_windows[player].discard(w)
+            elif own == 1:
+                # 相手の窓が生き返る
+                score[3 - player] += values[opp]
+                if opp == 4:
+                    self._four_windows[3 - player].add(w)
+                elif opp == 3:
+                    self._three_windows[3 - player].add(w)
+            own_counts[w] = own - 1
+
+    def winning_cells(self, player):
+        """player が置けば五連になる空きマス（行優先順）"""
+        cells = self._cells
+        result = set()
+        for w in self._four_windows[player]:
+            for idx in self._windows[w]:
+                if cells[idx] == 0:
+                    result.add(idx)
+        return [divmod(idx, self.size) for idx in sorted(result)]
+
+    def four_cells(self, player):
+        """player が置けば四（五連まであと1つ）になる空きマスと、その四の数"""
+        cells = self._cells
+        counts = {}
+        for w in self._three_windows[player]:
+            for idx in self._windows[w]:
+                if cells[idx] == 0:
+                    counts[idx] = counts.get(idx, 0) + 1
+        return counts
+
+    def winning_cells_after(self, r, c, player):
+        """(r, c) に player が置いた後の winning_cells"""
+        self._place(r, c, player)
+        cells = self.winning_cells(player)
+        self._remove(r, c)
+        return cells
+
+    def set_candidate_radius(self, radius):
+        """候補手の半径を変更する（中盤で半径1にする実験用）"""
+        self.candidate_radius = radius
+        self._init_candidates()
+        self._init_score_map()
+
+    def _place(self, r, c, player):
+        """盤面と付随する状態に石を置く（合法性チェックなし）"""
+        idx = r * self.size + c
+        self._mark_score_cell(idx)
+        self.board[r][c] = player
+        self._cells[idx] = player
+        self.zobrist_key ^= self._zobrist_stones[player][idx]
+        lines = self._lines
+        for line_id, shift in self._cell_lines[idx]:
+            lines[line_id] |= player << shift
+        if self.bitboard is not None:
+            self.bitboard.place(r, c, player)
+        self._add_to_windows(idx, player)
+        # 候補手集合の差分更新
+        cells = self._cells
+        near_count = self._near_count
+        candidates = self._candidates
+        candidates.discard(idx)
+        for n in self._neighbours[idx]:
+            near_count[n] += 1
+            if near_count[n] == 1 and cells[n] == 0:
+                candidates.add(n)
+
+    def _remove(self, r, c):
+        """_place で置いた石を取り除く"""
+        idx = r * self.size + c
+        player = self._cells[idx]
+        self.zobrist_key ^= self._zobrist_stones[player][idx]
+        self._remove_from_windows(idx, player)
+        self._mark_score_cell(idx)
+        self.board[r][c] = 0
+        self._cells[idx] = 0
+        lines = self._lines
+        for line_id, shift in self._cell_lines[idx]:
+            lines[line_id] &= ~(3 << shift)
+        if self.bitboard is not None:
+            self.bitboard.remove(r, c)
+        near_count = self._near_count
+        candidates = self._candidates
+        for n in self._neighbours[idx]:
+            near_count[n] -= 1
+            if near_count[n] == 0:
+                candidates.discard(n)
+        if near_count[idx] > 0:
+            candidates.add(idx)
+
+    def _window(self, r, c, d):
+        """方向 d の (r, c) を中心とする9マス窓のコード"""
+        line_id, shift = self._cell_lines[r * self.size + c][d]
+        return (self._lines[line_id] >> (shift - 8)) & WINDOW_MASK
+
+    def reset(self):
+        """盤面を初期状態に戻す（対局をまたいで探索の表は持ち越さない）"""
+        self._reset_board()
+        if self.tt is not None:
+            self.tt.clear()
+        if self._parallel is not None:
+            self._parallel.tt.clear()
+        self._reset_move_ordering()
+        self._pv = None
+
+    def close(self):
+        """ルート並列探索のワーカープロセスと共有置換表を片付ける（workers > 1 で使った後）
+
+        呼ばなくてもインタプリタの終了時には片付くが、解析器を使い終えたらすぐに呼ぶこと。
+        """
+        if self._parallel is not None:
+            self._parallel.shutdown()
+            self._parallel = None
+
+    def clone(self):
+        """同じ局面・設定の解析器を作る（置換表・ヒストリー・読み筋・並列探索のプールは共有する）
+
+        別スレッドで探索させる時に使う。共有した表を2つの探索から同時に使わないこと。
+        """
+        other = GomokuAnalyzer(self.size, self.backend, self.tt_size_mb, self.candidate_radius,
+                               self.search_options, self.workers)
+        if self.workers > 1:
+            other._parallel = self._get_parallel()
+        other.weights = dict(self.weights)
+        other.load_position(self.move_history, self.current_player)
+        if self.tt is None:
+            self.tt = TranspositionTable(self.tt_size_mb)
+        other.tt = self.tt
+        other._history = self._history
+        other._countermoves = self._countermoves
+        other._pv = self._pv
+        return other
+
+    def load_position(self, history, current_player):
+        """着手履歴 [(r, c, player), ...] の局面にする（探索の表はそのまま残す）"""
+        self._reset_board()
+        for r, c, player in history:
+            # 取り消しスタックには着手前の手番（打った側）を積むので、1手ごとに手番を合わせる
+            self.current_player = player
+            self.put_stone(r, c, player)
+        self.current_player = current_player
+
+    def _reset_board(self):
+        self.board.fill(0)
+        self._cells = [0] * (self.size * self.size)
+        self.current_player = 1
+        self.move_history = []
+        self._undo_stack = []
+        self.zobrist_key = 0
+        self._init_lines()
+        if self.bitboard is not None:
+            self.bitboard = BitBoard(self.size)
+        self._init_candidates()
+        self._init_threat_windows()
+        self._init_score_map()
+
+    def put_stone(self, r, c, player):
+        if 0 <= r < self.size and 0 <= c < self.size and self.board[r][c] == 0:
+            self._place(r, c, player)
+            self.move_history.append((r, c, player))
+            self._undo_stack.append(self.current_player)
+            return True
+        return False
+
+    def make_move(self, r, c):
+        """手番側の石を置いて手番を交代する（合法性チェックなし。unmake_move で戻せる）"""
+        player = self.current_player
+        self._place(r, c, player)
+        self.move_history.append((r, c, player))
+        self._undo_stack.append(player)
+        self.current_player = 3 - player
+
+    def unmake_move(self):
+        """直前の make_move / put_stone を取り消す"""
+        r, c, _ = self.move_history.pop()
+        self._remove(r, c)
+        self.current_player = self._undo_stack.pop()
+
+    def is_within_board(self, r, c):
+        """盤面内かどうかを判定"""
+        return 0 <= r < self.size and 0 <= c < self.size
+    
+    def get_line_openness(self, r, c, dr, dc, player):
+        """両端の開きを正確に判定"""
+        line_id, shift = self._cell_lines[r * self.size + c][DIRECTION_INDEX[(dr, dc)]]
+        line = self._lines[line_id]
+
+        def cell(i):
+            return (line >> (shift + 2 * i)) & 3
+
+        # 正方向・負方向の連続石を数える
+        pos_count = 0
+        while pos_count < 5 and cell(pos_count + 1) == player:
+            pos_count += 1
+        neg_count = 0
+        while neg_count < 5 and cell(-(neg_count + 1)) == player:
+            neg_count += 1
+
+        # 両端の空き判定（連続石の次のマス。盤外は3なので空きにならない）
+        front_open = cell(pos_count + 1) == 0
+        back_open = cell(-(neg_count + 1)) == 0
+        return front_open, back_open
+    
+    def detect_urgent_threats(self, player):
+        """緊急な脅威を検出（活四・活三など）。活三(>=1000)以上を返す"""
+        threats = []
+        # 各マスの最大パターン評価は差分更新しているスコアマップから読む
+        self._refresh_score_map()
+        threat_map = self._threat_map[player]
+        
+        for r, c in self.get_candidate_moves():
+            if self._cells[r * self.size + c] != 0:
+                continue
+            
+            # 活三(>=1000)以上を緊急脅威として扱う（活四=12000, 五連=100000等）
+            max_score = threat_map[r * self.size + c]
+            if max_score >= 1000:
+                threats.append((r, c, max_score))
+        
+        # スコア順（降順）にして返す
+        threats.sort(key=lambda x: -x[2])
+        return threats
+
+    def max_pattern_score(self, r, c, player):
+        """4方向の evaluate_pattern の最大値"""
+        max_score = 0
+        for dr, dc in DIRECTIONS:
+            score = self.evaluate_pattern(r, c, dr, dc, player)
+            if score > max_score:
+                max_score = score
+        return max_score
+
+    def pattern_class(self, r, c, dr, dc, player):
+        """1方向のパターン分類を返す（(r, c) に player が置いたものとして扱う）"""
+        return PATTERN_CLASS[player][self._window(r, c, DIRECTION_INDEX[(dr, dc)])]
+
+    def pattern_class_at(self, r, c, d, player):
+        """pattern_class の方向番号版（d は DIRECTIONS の添字）"""
+        return PATTERN_CLASS[player][self._window(r, c, d)]
+
+    def evaluate_pattern(self, r, c, dr, dc, player):
+        """1方向のパターンを事前計算した分類表で評価"""
+        # 五連・活四・眠四・活三・眠三・活二 の分類は pattern_table で一度だけ計算済み
+        name = PATTERN_NAMES[self.pattern_class(r, c, dr, dc, player)]
+        if name is None:
+            return 0
+        return self.weights[name]
+
+    def detect_forks(self, r, c, player):
+        """三三、四三などのフォークを検出"""
+        directions = [(0, 1), (1, 0), (1, 1), (1, -1)]
+        
+        # 各方向の脅しの強さを評価
+        threats = []
+        for dr, dc in directions:
+            score = self.evaluate_pattern(r, c, dr, dc, player)
+            
+            # ここも本当は weights を参照するとより進化しやすくなります
+            if score >= self.weights['open_four']: # 10000の代わりに
+                threats.append('four')
+            elif score >= self.weights['open_three']: # 1000の代わりに
+                threats.append('three')
+            elif score >= self.weights['dead_three']: # 200の代わりに
+                threats.append('half-three')
+        
+        # フォークのボーナス計算
+        bonus = 0
+        three_count = threats.count('three')
+        four_count = threats.count('four')
+        
+        # --- 直接の数字を self.weights の項目名に変更 ---
+        if four_count >= 2:
+            bonus += self.weights['fork_44']  # 15000の代わり
+        if four_count >= 1 and three_count >= 1:
+            bonus += self.weights['fork_43']  # 8000の代わり
+        if three_count >= 2:
+            bonus += self.weights['fork_33']  # 3000の代わり
+        
+        return bonus
+
+    def evaluate_board_enhanced(self, for_player=None):
+        """改良版評価関数 - 全候補手を一から計算する（スコアマップの検証用）"""
+        if for_player is None:
+            for_player = self.current_player
+        
+        scores = np.zeros((self.size, self.size))
+        
+        # 候補手の限定（既存の石から2マス以内）
+        candidate_moves = self.get_candidate_moves()
+        
+        for r, c in candidate_moves:
+            if self.board[r][c] != 0:
+                continue
+            scores[r][c] = self.evaluate_cell(r, c, for_player)
+        
+        return scores
+
+    def evaluate_board_vectorized(self, for_player=None):
+        """evaluate_board_enhanced の NumPy 一括計算版（同じ値を返す）"""
+        if for_player is None:
+            for_player = self.current_player
+        return evaluate_boards(self.board, self.weights, for_player, self.candidate_radius)
+
+    def evaluate_cell(self, r, c, for_player):
+        """1マスの総合スコア（攻撃・フォーク・防御・中央性・継続性）"""
+        directions = [(0, 1), (1, 0), (1, 1), (1, -1)]
+        
+        # 攻撃スコア（自分の石の評価）
+        attack_score = 0
+        for dr, dc in directions:
+            attack_score += self.evaluate_pattern(r, c, dr, dc, for_player)
+        
+        # フォークボーナス
+        fork_bonus = self.detect_forks(r, c, for_player)
+        attack_score += fork_bonus
+        
+        # 防御スコア（相手の石の評価を阻止する価値）
+        defense_score = 0
+        opponent = 3 - for_player
+        
+        for dr, dc in directions:
+            opp_score = self.evaluate_pattern(r, c, dr, dc, opponent)
+            # 相手の強い脅しを防ぐ価値
+            if opp_score >= 10000:  # 相手の活四を防ぐ
+                defense_score += 50000
+            elif opp_score >= 1000:  # 相手の活三を防ぐ
+                defense_score += 2000
+            elif opp_score >= 200:   # 相手の眠三を防ぐ
+                defense_score += 300
+        
+        # 中央性ボーナス
+        center = self.size // 2
+        distance = abs(r - center) + abs(c - center)
+        center_bonus = max(0, 10 - distance) * self.weights.get('center_bonus', 100)
+        
+        # 既存の脅しを活かすボーナス
+        continuity_bonus = self.continuity_bonus(r, c, for_player)
+        
+        # 総合スコア（攻撃:1.0, 防御:weights['defense_weight']の重み）
+        return (attack_score * 1.0 + defense_score * self.weights['defense_weight'] + 
+                center_bonus + continuity_bonus)
+
+    def _init_score_map(self):
+        """評価値マップ（手番ごとの evaluate_cell と最大パターン評価）を初期化"""
+        cells = self.size * self.size
+        # 石が置かれた・取られた時に評価が変わりうるマス:
+        # 4方向の前後4マス（パターン・継続性）と候補手半径内（候補手かどうか）
+        self._score_affected = []
+        for idx in range(cells):
+            r, c = divmod(idx, self.size)
+            affected = {idx}
+            affected.update(self._neighbours[idx])
+            for dr, dc in DIRECTIONS:
+                for i in range(-4, 5):
+                    nr, nc = r + dr * i, c + dc * i
+                    if self.is_within_board(nr, nc):
+                        affected.add(nr * self.size + nc)
+            self._score_affected.append(frozenset(affected))
+        self._score_map = [None, [0.0] * cells, [0.0] * cells]
+        self._threat_map = [None, [0] * cells, [0] * cells]
+        # 手番ごとの最大ヒープ（(-スコア, マス) の遅延削除方式）
+        self._score_heaps = [None, [], []]
+        self._score_weights = None
+        self._score_dirty = set(range(cells))
+        # 前回の再計算以降に触ったマス -> 再計算した時の石（今の石と違えば周りを再計算する）
+        self._score_changed = {}
+        self._score_center_only = False
+        # 使っていない weights の評価値マップ（weights の中身 -> 退避した状態）
+        self._score_stash = {}
+
+    def _mark_score_cell(self, idx):
+        """石を置く・取り除く直前に呼び、前回の再計算の時の石を覚えておく"""
+        if idx not in self._score_changed:
+            self._score_changed[idx] = self._cells[idx]
+
+    def _switch_score_weights(self):
+        """weights が差し替えられた時、その weights の評価値マップに切り替える
+
+        GA の対局では2つの weights を1手ごとに交互に使うので、weights ごとにマップを退避しておき、
+        戻ってきた時は離れていた間に石が変わったマスだけを再計算する。
+        """
+        if self._score_weights is not None:
+            key = tuple(sorted(self._score_weights.items()))
+            self._score_stash[key] = (self._score_weights, self._score_map, self._threat_map,
+                                      self._score_heaps, self._score_dirty, self._score_changed,
+                                      self._score_center_only, list(self._cells))
+            if len(self._score_stash) > SCORE_MAP_STASH_SIZE:
+                del self._score_stash[next(iter(self._score_stash))]
+        saved = self._score_stash.pop(tuple(sorted(self.weights.items())), None)
+        if saved is None:
+            # 初めて使う weights は全マス再計算
+            cells = self.size * self.size
+            self._score_map = [None, [0.0] * cells, [0.0] * cells]
+            self._threat_map = [None, [0] * cells, [0] * cells]
+            self._score_heaps = [None, [], []]
+            self._score_dirty = set(range(cells))
+            self._score_changed = {}
+            self._score_center_only = False
+        else:
+            (_, self._score_map, self._threat_map, self._score_heaps, self._score_dirty,
+             self._score_changed, self._score_center_only, snapshot) = saved
+            for idx, stone in enumerate(snapshot):
+                if stone != self._cells[idx]:
+                    self._score_changed.setdefault(idx, stone)
+        self._score_weights = dict(self.weights)
+
+    def _refresh_score_map(self):
+        """汚れたマスだけ評価値マップを再計算する"""
+        if self._score_weights != self.weights:
+            self._switch_score_weights()
+        dirty = self._score_dirty
+        cells = self._cells
+        for idx, stone in self._score_changed.items():
+            if cells[idx] != stone:
+                dirty |= self._score_affected[idx]
+        self._score_changed = {}
+        if self._score_center_only != (not self._candidates):
+            # 空の盤面では中央が唯一の候補手になるので、切り替わった時は中央も再計算
+            self._score_center_only = not self._candidates
+            dirty.add((self.size // 2) * self.size + self.size // 2)
+        if not dirty:
+            return
+        active = self._active_candidates()
+        for idx in dirty:
+            r, c = divmod(idx, self.size)
+            live = idx in active and cells[idx] == 0
+            for player in (1, 2):
+                if live:
+                    score = self.evaluate_cell(r, c, player)
+                    self._score_map[player][idx] = score
+                    self._threat_map[player][idx] = self.max_pattern_score(r, c, player)
+                    heapq.heappush(self._score_heaps[player], (-score, idx))
+                else:
+                    self._score_map[player][idx] = 0.0
+                    self._threat_map[player][idx] = 0
+        self._score_dirty = set()
+        # 古いエントリが溜まりすぎたらヒープを作り直す
+        limit = 4 * self.size * self.size
+        for player in (1, 2):
+            if len(self._score_heaps[player]) > limit:
+                heap = [(-self._score_map[player][idx], idx) for idx in active if cells[idx] == 0]
+                heapq.heapify(heap)
+                self._score_heaps[player] = heap
+
+    def _active_candidates(self):
+        """get_candidate_moves と同じ候補手をマス番号の集合で返す"""
+        if self._candidates:
+            return self._candidates
+        return {(self.size // 2) * self.size + self.size // 2}
+
+    def get_score_map(self, for_player=None):
+        """差分更新した評価値マップ（evaluate_board_enhanced と同じ値）を返す"""
+        if for_player is None:
+            for_player = self.current_player
+        self._refresh_score_map()
+        return np.array(self._score_map[for_player], dtype=float).reshape(self.size, self.size)
+
+    def get_top_scored_moves(self, for_player=None):
+        """評価値マップで最大のスコアを持つ候補手（同点はすべて、行優先順）"""
+        if for_player is None:
+            for_player = self.current_player
+        self._refresh_score_map()
+        heap = self._score_heaps[for_player]
+        score_map = self._score_map[for_player]
+        active = self._active_candidates()
+        # 古くなったエントリを捨ててから先頭を読む
+        while heap:
+            neg_score, idx = heap[0]
+            if idx in active and self._cells[idx] == 0 and score_map[idx] == -neg_score:
+                break
+            heapq.heappop(heap)
+        if not heap:
+            return [], None
+        max_score = -heap[0][0]
+        moves = [(r, c) for r, c in self.get_candidate_moves()
+                 if self._cells[r * self.size + c] == 0
+                 and abs(score_map[r * self.size + c] - max_score) < 1e-9]
+        return moves, max_score
+    
+    def get_candidate_moves(self):
+        """探索範囲を限定（石の周囲 candidate_radius マスのみ）"""
+        # 着手・探索のたびに差分更新している集合をそのまま使う
+        if not self._candidates:
+            # 空の盤面の場合、中央を候補に
+            return [(self.size // 2, self.size // 2)]
+        size = self.size
+        return [divmod(idx, size) for idx in sorted(self._candidates)]
+    
+    def continuity_bonus(self, r, c, player):
+        """攻めの継続性ボーナス（既存の攻撃ラインを活かす手）"""
+        bonus = 0
+        back_table = RUN_BACK[player]
+        forward_table = RUN_FORWARD[player]
+        
+        for d in range(len(DIRECTIONS)):
+            # この方向に既に並んでいる自分の石の数を数える（片側3つまで）
+            code = self._window(r, c, d)
+            count = min(forward_table[code], 3) + min(back_table[code], 3)
+            
+            if count >= 2:
+                bonus += 100 * count  # 既に並んでいる石の近くに打つボーナス
+        
+        return bonus
+        
+    def evaluate_board(self, for_player=None):
+        """従来の評価関数（後方互換性のため保持）。差分更新した評価値マップを返す"""
+        return self.get_score_map(for_player)
+
+    def check_win(self, r, c, player):
+        """勝利判定"""
+        if self.bitboard is not None:
+            return self.bitboard.is_five_through(r, c, player)
+        table = PATTERN_CLASS[player]
+        for d in range(len(DIRECTIONS)):
+            # 9マス窓の中に中央を含む五連があるか（窓の片側は4マスなので五連は必ず中央を含む）
+            if table[self._window(r, c, d)] == PATTERN_FIVE:
+                return True
+        return False
+    
+    def _make_controller(self, depth_limit=None, time_limit=None, node_limit=None):
+        """get_best_move の引数から探索の予算を決める"""
+        if time_limit is None and depth_limit is None and node_limit is None:
+            time_limit = DEFAULT_TIME_LIMIT  # 通常プレイ時は1秒制限
+        if time_limit is None:
+            # 深さ・ノード数の指定がある時は時間制限なし（結果が再現できる）
+            return SearchController(max_nodes=node_limit)
+        # 残り時間が半分を切ったら次の深さは始めない
+        return SearchController(soft_time=time_limit * 0.5, hard_time=time_limit,
+                                max_nodes=node_limit)
+
+    def get_best_move(self, depth_limit=None, time_limit=None, node_limit=None, controller=None):
+        """最善手探索（反復深化付き＋急所検出）
+
+        depth_limit: 探索深さを固定する
+        time_limit: 秒数の上限（省略時は1秒。深さ・ノード数指定時は無制限）
+        node_limit: ノード数の上限（時間に依存しない再現可能な探索）
+        controller: 予算を外から渡す（別スレッドから cancel() したい時など）。
+                    渡した時は time_limit と node_limit は使わない
+        """
+        # 前の探索の統計を残さない（急所や脅威空間探索で決まった時は深さ0のまま）
+        self.search_stats = {'depth': 0, 'nodes': 0, 'time': 0.0, 'score': None, 'aborted': False}
+
+        # 【最優先：相手の即勝ち手を防ぐ】
+        player = self.current_player
+        opponent = 3 - self.current_player
+        candidate_moves = self.get_candidate_moves()
+        
+        for r, c in candidate_moves:
+            if self.check_win(r, c, opponent):
+                #print(f"  → 防御急所！({r}, {c}) に着手してブロック")
+                return (r, c)
+        
+        # 【自分の即勝ち手があれば指す】
+        for r, c in candidate_moves:
+            if self.check_win(r, c, self.current_player):
+                #print(f"  → 勝利急所！({r}, {c}) に着手して勝利")
+                return (r, c)
+
+        # 【脅威空間探索】四の連続（VCF）で勝てるなら指す
+        # （予算は決まったノード数。読んだノードは探索の予算にも数えるので、時間・ノード数の
+        #  上限も守り、時間制限の無い探索でも結果が再現できる）
+        if controller is None:
+            controller = self._make_controller(depth_limit, time_limit, node_limit)
+        controller.start()
+        solver = ThreatSpaceSearch(self, max_nodes=self._threat_search_nodes(controller),
+                                   controller=controller)
+        try:
+            move = self._threat_move(solver, player, opponent)
+        except SearchAborted:
+            # 脅威空間探索の途中で中断された（または時間・ノード数を使い切った）
+            self.search_stats.update(nodes=controller.nodes, time=controller.elapsed(), aborted=True)
+            return self.get_best_move_static()
+        self.search_stats.update(nodes=controller.nodes, time=controller.elapsed())
+        if move is not None:
+            return move
+
+        # 最初の数手は静的評価
+        if len(self.move_history) < 3:
+            return self.get_best_move_static()
+        
+        # 反復深化探索（時間・ノード数制限付き）。workers > 1 ならルートの手を複数プロセスで分担
+        root_moves = self.get_ordered_moves(self.current_player)
+        if self.workers > 1:
+            best_move = self._parallel_search(root_moves, controller, depth_limit)
+        else:
+            best_move = self.search_root_moves(root_moves, controller, depth_limit)
+        return best_move if best_move else self.get_best_move_static()
+
+    def _threat_move(self, solver, player, opponent):
+        """脅威空間探索と急所検出で決まる手。決まらなければ None
+
+        solver の予算は get_best_move の SearchController と共有しているので、
+        中断や時間切れの時は SearchAborted がそのまま伝わる。
+        """
+        vcf = solver.find_vcf(player)
+        if vcf:
+            return vcf[0]
+        
+        # 相手に四の連続の勝ちがあれば、それを崩す手を指す
+        opp_vcf = solver.find_vcf(opponent)
+        if opp_vcf:
+            defence = self._defend_threat_sequence(solver, opponent, opp_vcf, MODE_VCF)
+            if defence:
+                return defence
+
+        # 【追加】相手の活三・活四などの緊急脅威を検出してブロック
+        urgent = self.detect_urgent_threats(opponent)
+        if urgent:
+            ur = urgent[0]
+            #print(f"  → 防御急所(urgent)！({ur[0]}, {ur[1]}) に着手して阻止 (score={ur[2]})")
+            return (ur[0], ur[1])
+        
+        # 三・四の連続（VCT）で勝てるなら指す。相手の VCT は崩しておく
+        vct = solver.find_vct(player)
+        if vct:
+            return vct[0]
+        opp_vct = solver.find_vct(opponent)
+        if opp_vct:
+            defence = self._defend_threat_sequence(solver, opponent, opp_vct, MODE_VCT)
+            if defence:
+                return defence
+        
+         # 【追加】自分の活三・活四を優先して攻める
+        my_urgent = self.detect_urgent_threats(player)
+        if my_urgent:
+            ur = my_urgent[0]
+            #print(f"  → 攻撃急所！({ur[0]}, {ur[1]}) に着手 (score={ur[2]})")
+            return (ur[0], ur[1])
+        return None
+
+    def _threat_search_nodes(self, controller):
+        """脅威空間探索に使うノード数（ノード数の上限がある時は半分は αβ 探索に残す）"""
+        nodes = THREAT_SEARCH_NODES
+        if controller.max_nodes is not None:
+            nodes = min(nodes, max(1, controller.max_nodes // 2))
+        return nodes
+
+    def _get_parallel(self):
+        """ルート並列探索のプロセスプール（最初の呼び出しで作り、以後使い回す）"""
+        if self._parallel is None or self._parallel.workers != self.workers:
+            if self._parallel is not None:
+                self._parallel.shutdown()
+            self._parallel = ParallelSearch(self.workers, self.size, self.backend,
+                                            self.tt_size_mb, self.candidate_radius)
+        return self._parallel
+
+    def _parallel_search(self, root_moves, controller, depth_limit):
+        """ルート並列探索"""
+        best_move, self.search_stats = self._get_parallel().search(self, root_moves, controller,
+                                                                   depth_limit)
+        if best_move is not None:
+            self._pv = (len(self.move_history), self.search_stats['pv'])
+        return best_move
+
+    def search_root_moves(self, root_moves, controller, depth_limit=None):
+        """root_moves だけを対象に反復深化で読み、最善手を返す（結果は search_stats）
+
+        controller は開始済みの SearchController。並列探索のワーカーからも呼ばれる。
+        """
+        self._start_search(controller)
+        best_move = None
+        best_score = -float('inf')
+        completed_depth = 0
+        iterations = []
+        root_moves, pv_move = self._order_root_moves(root_moves)
+        root_key = self.zobrist_key ^ self._zobrist_side[self.current_player]
+
+        options = self.search_options
+        aspiration_fails = 0
+        for depth in self._iteration_depths(depth_limit):
+            if not controller.can_start_iteration():
+                break
+            
+            try:
+                if (options['aspiration'] and completed_depth
+                        and abs(best_score) < WIN_SCORE):
+                    # 前の深さの評価値の周りだけを読み、窓から外れたら全幅で読み直す
+                    window = options['aspiration_window']
+                    alpha, beta = best_score - window, best_score + window
+                    score, move = self._search_root(root_moves, depth, alpha, beta)
+                    # 外れた側だけ窓を開いて読み直す
+                    if score <= alpha:
+                        aspiration_fails += 1
+                        score, move = self._search_root(root_moves, depth, -float('inf'), beta)
+                    elif score >= beta:
+                        aspiration_fails += 1
+                        score, move = self._search_root(root_moves, depth, alpha, float('inf'))
+                else:
+                    score, move = self._search_root(root_moves, depth,
+                                                    -float('inf'), float('inf'))
+            except SearchAborted:
+                # 途中で打ち切った深さの結果は捨てる
+                break
+            if move is None:
+                break  # 打てる手が無い
+            
+            # 完了した深さだけを採用し、次の深さは最善手から読む
+            best_score, best_move = score, move
+            iterations.append((depth, score, move))
+            self.current_best = move
+            root_moves.remove(move)
+            root_moves.insert(0, move)
+            completed_depth = depth
+            self.tt.store(root_key, depth, BOUND_EXACT, best_score,
+                          best_move[0] * self.size + best_move[1])
+            if best_score >= WIN_SCORE:
+                break  # 勝ちが読み切れた
+        
+        self.search_stats = {
+            'depth': completed_depth,
+            'nodes': controller.nodes,
+            'time': controller.elapsed(),
+            'score': best_score,
+            'aborted': controller.aborted,
+            'aspiration_fails': aspiration_fails,
+            'quiescence_nodes': self._quiescence_nodes,
+            # βカットのうち最初に読んだ手で起きた割合（手の順序付けの質）
+            'first_move_cutoff_rate': (self._first_move_cutoffs / self._cutoffs
+                                       if self._cutoffs else 0.0),
+            # 完了した深さごとの (深さ, 評価値, 最善手)
+            'iterations': iterations,
+            'pv_move': pv_move,
+        }
+        if best_move is not None:
+            self._pv = (len(self.move_history), self._extract_pv(best_move))
+        self._controller = SearchController()
+        return best_move
+
+    def _start_search(self, controller):
+        """探索の開始時の準備（予算の差し替え・置換表の世代・手の順序付けの表）"""
+        self._controller = controller
+        self.current_best = None
+        self._quiescence_nodes = 0
+        # 置換表は対局中ずっと残し、世代を進めて前の探索のエントリを置き換えやすくする
+        # （共有している表の世代は並列探索の親プロセスが進める）
+        if self.tt is None:
+            self.tt = TranspositionTable(self.tt_size_mb)
+        if not self.tt.shared:
+            self.tt.new_search()
+        self._age_move_ordering()
+
+    def _order_root_moves(self, root_moves):
+        """前回の読み筋どおりに進んでいれば、読み筋の続きの手から読む。(手のリスト, その手) を返す"""
+        root_moves = list(root_moves)
+        pv_move = self._pv_move()
+        if pv_move in root_moves:
+            root_moves.remove(pv_move)
+            root_moves.insert(0, pv_move)
+        return root_moves, pv_move
+
+    def _iteration_depths(self, depth_limit):
+        """深さ1から徐々に深く（深さ指定がある時はその深さだけ）"""
+        if depth_limit is not None:
+            return range(depth_limit, depth_limit + 1)
+        return range(1, MAX_SEARCH_DEPTH + 1)
+
+    def iter_analysis(self, k=3, depth_limit=None, time_limit=None, node_limit=None,
+                      controller=None):
+        """上位 k 手の評価値と読み筋を、反復深化の深さが1つ終わるごとに yield する
+
+        yield するのは評価値の高い順の [{'move', 'score', 'pv', 'depth'}, ...]。
+        評価値は手番側から見た探索の値で、急所検出や脅威空間探索は使わない。
+        予算の指定は get_best_move と同じ（省略時は1秒）。yield の間に局面を変えないこと。
+        """
+        if controller is None:
+            controller = self._make_controller(depth_limit, time_limit, node_limit)
+        controller.start()
+        self._start_search(controller)
+        root_moves, _ = self._order_root_moves(self.get_ordered_moves(self.current_player))
+        self.search_stats = {'depth': 0, 'nodes': 0, 'time': 0.0, 'score': None, 'aborted': False,
+                             'lines': 0}
+        try:
+            for depth in self._iteration_depths(depth_limit):
+                if not controller.can_start_iteration():
+                    break
+                try:
+                    top = self._search_root_multipv(root_moves, depth, k)
+                except SearchAborted:
+                    break  # 途中で打ち切った深さの結果は捨てる
+                if not top:
+                    break  # 打てる手が無い
+                
+                # 次の深さは今回の順位どおりに読む
+                ranked = [move for _, move in top]
+                root_moves = ranked + [move for move in root_moves if move not in ranked]
+                self.current_best = ranked[0]
+                lines = [{'move': move, 'score': score, 'pv': self._extract_pv(move), 'depth': depth}
+                         for score, move in top]
+                self._pv = (len(self.move_history), lines[0]['pv'])
+                self.search_stats = {
+                    'depth': depth,
+                    'nodes': controller.nodes,
+                    'time': controller.elapsed(),
+                    'score': top[0][0],
+                    'aborted': False,
+                    'lines': len(lines),
+                }
+                yield lines
+                if top[0][0] >= WIN_SCORE:
+                    break  # 勝ちが読み切れた
+        finally:
+            self.search_stats['aborted'] = controller.aborted
+            self._controller = SearchController()
+
+    def analyze(self, k=3, depth_limit=None, time_limit=None, node_limit=None, controller=None,
+                callback=None):
+        """iter_analysis を最後まで回し、一番深い深さの上位 k 手を返す
+
+        callback を渡すと、深さが1つ終わるごとにその時点の上位 k 手で呼ぶ。
+        """
+        lines = []
+        for lines in self.iter_analysis(k, depth_limit, time_limit, node_limit, controller):
+            if callback is not None:
+                callback(lines)
+        return lines
+
+    def _search_root_multipv(self, root_moves, depth, k):
+        """ルートの上位 k 手を正確な評価値で読む。[(評価値, 手), ...] を高い順に返す
+
+        k 番目の評価値を α にするので、上位に入らない手は α 以下と分かった所で打ち切れる。
+        """
+        pvs = self.search_options['pvs']
+        top = []
+        for r, c in root_moves:
+            full = len(top) >= k
+            alpha = top[-1][0] if full else -float('inf')
+            self.make_move(r, c)
+            try:
+                score = None
+                if pvs and full:
+                    score = -self.negamax(depth - 1, -alpha - 1, -alpha, (r, c))
+                    if score > alpha:
+                        score = None
+                if score is None:
+                    score = -self.negamax(depth - 1, -float('inf'), -alpha, (r, c))
+            finally:
+                self.unmake_move()
+            if not full or score > alpha:
+                top.append((score, (r, c)))
+                top.sort(key=lambda item: -item[0])
+                del top[k:]
+        return top
+
+    def _search_root(self, root_moves, depth, alpha, beta):
+        """ルートの αβ 探索。(評価値, 最善手) を返す"""
+        pvs = self.search_options['pvs']
+        best_score = -float('inf')
+        best_move = None
+        for index, (r, c) in enumerate(root_moves):
+            self.make_move(r, c)
+            try:
+                score = None
+                if pvs and index > 0:
+                    score = -self.negamax(depth - 1, -alpha - 1, -alpha, (r, c))
+                    if alpha < score < beta:
+                        score = None
+                if score is None:
+                    score = -self.negamax(depth - 1, -beta, -alpha, (r, c))
+            finally:
+                self.unmake_move()
+            if score > best_score:
+                best_score = score
+                best_move = (r, c)
+            if best_score > alpha:
+                alpha = best_score
+            if alpha >= beta:
+                break
+        return best_score, best_move
+
+    def _defend_threat_sequence(self, solver, attacker, sequence, mode):
+        """相手（attacker）の勝ち手順を崩す手を探す。見つからなければ None"""
+        # 手順に出てくるマスを優先して試す
+        candidates = []
+        for r, c in sequence:
+            if self._cells[r * self.size + c] == 0 and (r, c) not in candidates:
+                candidates.append((r, c))
+        for r, c in candidates[:MAX_THREAT_DEFENCES]:
+            self._place(r, c, self.current_player)
+            try:
+                # 予算切れで None になった時は崩せたとは言えない
+                refuted = solver.find(attacker, mode) is None and not solver.exhausted
+            finally:
+                self._remove(r, c)
+            if refuted:
+                return (r, c)
+            if solver.exhausted:
+                break
+        return None
+
+    def get_best_move_static(self):
+        """静的評価関数のみを使用（急所検出付き）"""
+        candidate_moves = self.get_candidate_moves()
+        
+        # 【最優先：相手の即勝ち手を防ぐ】
+        opponent = 3 - self.current_player
+        for r, c in candidate_moves:
+            if self.check_win(r, c, opponent):
+                #print(f"  → 防御急所（static）！({r}, {c}) に着手してブロック")
+                return (r, c)
+        
+        # 【自分の即勝ち手があれば指す】
+        for r, c in candidate_moves:
+            if self.check_win(r, c, self.current_player):
+                #print(f"  → 勝利急所（static）！({r}, {c}) に着手して勝利")
+                return (r, c)
+        
+        # 通常の評価で決める（差分更新している評価値マップの最大値）
+        best_moves, _ = self.get_top_scored_moves(self.current_player)
+        
+        if best_moves:
+            return random.choice(best_moves)
+        
+        # フォールバック
+        center = self.size // 2
+        for dr in range(self.size):
+            for dc in range(self.size):
+                r = (center + dr) % self.size
+                c = (center + dc) % self.size
+                if self.board[r][c] == 0:
+                    return r, c
+        
+        return None
+
+    def get_game_state(self):
+        """ゲーム状態を文字列で返す"""
+        state = []
+        for r in range(self.size):
+            row = []
+            for c in range(self.size):
+                if self.board[r][c] == 0:
+                    row.append('.')
+                elif self.board[r][c] == 1:
+                    row.append('B')
+                else:
+                    row.append('W')
+            state.append(''.join(row))
+        return '\n'.join(state)
+    
+    def negamax(self, depth, alpha, beta, last_move=None, ply=1):
+        """αβ枝切り付きネガマックス法。手番側（current_player）から見た評価値を返す"""
+        player = self.current_player
+        self._controller.tick()
+        
+        # 直前の手で相手が五連を作っていれば負け（早い勝ちほど高く評価されるよう深さを足す）
+        if last_move is not None and self.check_win(last_move[0], last_move[1], 3 - player):
+            return -(WIN_SCORE + depth)
+        
+        # 深さ0で評価
+        if depth == 0:
+            if self.search_options['quiescence']:
+                return self.quiescence(alpha, beta)
+            return self.quick_evaluate(player)
+        
+        # 置換表を参照（評価値は手番側から見た値で保存している）
+        tt = self.tt
+        key = self.zobrist_key ^ self._zobrist_side[player]
+        alpha_orig = alpha
+        tt_move = None
+        entry = tt.probe(key) if tt is not None else None
+        if entry is not None:
+            tt_depth, bound, tt_score, tt_move = entry
+            if tt_depth >= depth:
+                if bound == BOUND_EXACT:
+                    return tt_score
+                if bound == BOUND_LOWER:
+                    alpha = max(alpha, tt_score)
+                else:
+                    beta = min(beta, tt_score)
+                if alpha >= beta:
+                    return tt_score
+        
+        options = self.search_options
+        pvs = options['pvs']
+        lmr = options['lmr'] and depth >= options['lmr_min_depth']
+        last_idx = None if last_move is None else last_move[0] * self.size + last_move[1]
+        best_score = -float('inf')
+        best_move = None
+        for index, move in enumerate(self._staged_moves(player, tt_move, ply, last_idx)):
+            r, c = divmod(move, self.size)
+            reduce = (lmr and index >= options['lmr_move_index']
+                      and self._is_quiet_move(r, c, player))
+            self.make_move(r, c)
+            try:
+                score = None
+                if reduce:
+                    # 1手浅いヌルウィンドウで読み、α を超えそうな時だけ読み直す
+                    score = -self.negamax(depth - 2, -alpha - 1, -alpha, (r, c), ply + 1)
+                    if score > alpha:
+                        score = None
+                if score is None and pvs and index > 0:
+                    score = -self.negamax(depth - 1, -alpha - 1, -alpha, (r, c), ply + 1)
+                    if alpha < score < beta:
+                        score = None
+                if score is None:
+                    score = -self.negamax(depth - 1, -beta, -alpha, (r, c), ply + 1)
+            finally:
+                self.unmake_move()
+            if score > best_score:
+                best_score = score
+                best_move = move
+            if best_score > alpha:
+                alpha = best_score
+            if alpha >= beta:
+                self._record_cutoff(player, move, depth, ply, last_idx, index)
+                break
+        
+        if best_move is None:
+            return 0  # 打つ場所が無い（引き分け）
+        
+        if tt is not None:
+            if best_score <= alpha_orig:
+                bound = BOUND_UPPER
+            elif best_score >= beta:
+                bound = BOUND_LOWER
+            else:
+                bound = BOUND_EXACT
+            tt.store(key, depth, bound, best_score, best_move)
+        return best_score
+
+    def quiescence(self, alpha, beta, qply=0):
+        """静止探索。局面が静かになるまで四と四止め（設定により三の受け）だけを読む
+
+        手番側から見た評価値を返す。直前の手の五連判定は呼び出し側で済ませておくこと。
+        """
+        player = self.current_player
+        opponent = 3 - player
+        self._controller.tick()
+        
+        # 五が打てれば勝ち、相手の四が2つ以上あれば止められない
+        if self.winning_cells(player):
+            return WIN_SCORE
+        threats = self.winning_cells(opponent)
+        if len(threats) >= 2:
+            return -WIN_SCORE
+        
+        options = self.search_options
+        stand_pat = self.quick_evaluate(player)
+        if (qply >= options['quiescence_max_ply']
+                or self._quiescence_nodes >= options['quiescence_max_nodes']):
+            return stand_pat
+        self._quiescence_nodes += 1
+        
+        if threats:
+            # 相手の四は止めるしかない（何もしない選択肢は無い）
+            best_score = -float('inf')
+            moves = threats
+        else:
+            if stand_pat >= beta:
+                return stand_pat
+            best_score = stand_pat
+            if stand_pat > alpha:
+                alpha = stand_pat
+            moves = self._forcing_moves(player, options['quiescence_threes'])
+        
+        for r, c in moves:
+            self.make_move(r, c)
+            try:
+                score = -self.quiescence(-beta, -alpha, qply + 1)
+            finally:
+                self.unmake_move()
+            if score > best_score:
+                best_score = score
+            if best_score > alpha:
+                alpha = best_score
+            if alpha >= beta:
+                break
+        return best_score
+
+    def _forcing_moves(self, player, answer_threes=False):
+        """静止探索で読む手: 四を作る手（強い順）と、必要なら相手の活三を止める手"""
+        # 四は差分更新している3石の窓から拾う（多くの窓で四になるマスから）
+        counts = self.four_cells(player)
+        moves = sorted(counts, key=lambda idx: (-counts[idx], idx))
+        if answer_threes:
+            opponent = 3 - player
+            for idx in sorted(self.four_cells(opponent)):
+                if idx in counts:
+                    continue
+                r, c = divmod(idx, self.size)
+                for d in range(4):
+                    if self.pattern_class_at(r, c, d, opponent) >= PATTERN_OPEN_FOUR:
+                        moves.append(idx)
+                        break
+        return [divmod(idx, self.size) for idx in moves]
+
+    def _is_quiet_move(self, r, c, player):
+        """四を作らず、相手の三（四）も止めない手か（LMR で浅く読んでよい手）"""
+        opponent = 3 - player
+        for d in range(4):
+            if self.pattern_class_at(r, c, d, player) >= PATTERN_DEAD_FOUR:
+                return False
+            # 相手がここに打つと活四以上 = 相手の活三（四）を止める点
+            if self.pattern_class_at(r, c, d, opponent) >= PATTERN_OPEN_FOUR:
+                return False
+        return True
+
+    def _extract_pv(self, best_move, max_length=8):
+        """best_move から置換表の最善手をたどった読み筋を返す"""
+        pv = [best_move]
+        r, c = best_move
+        self.make_move(r, c)
+        while len(pv) < max_length and not self.check_win(r, c, 3 - self.current_player):
+            entry = self.tt.probe(self.zobrist_key ^ self._zobrist_side[self.current_player])
+            if entry is None or entry[3] is None or self._cells[entry[3]] != 0:
+                break
+            r, c = divmod(entry[3], self.size)
+            pv.append((r, c))
+            self.make_move(r, c)
+        for _ in pv:
+            self.unmake_move()
+        return pv
+
+    def _pv_move(self):
+        """前回の読み筋どおりに進んでいれば、その続きの手を返す"""
+        if self._pv is None:
+            return None
+        base, pv = self._pv
+        played = [(r, c) for r, c, _ in self.move_history[base:]]
+        if 0 < len(played) < len(pv) and played == pv[:len(played)]:
+            return pv[len(played)]
+        return None
+
+    def _age_move_ordering(self):
+        """探索の開始時: キラー手は捨て、ヒストリーは半分にして前回の傾向を少し残す"""
+        self._killers = [[None, None] for _ in range(MAX_SEARCH_DEPTH + 2)]
+        for player in (1, 2):
+            self._history[player] = [value >> 1 for value in self._history[player]]
+        self._cutoffs = 0
+        self._first_move_cutoffs = 0
+
+    def _reset_move_ordering(self):
+        """キラー手・ヒストリー・カウンター手の表を初期化"""
+        cells = self.size * self.size
+        self._killers = [[None, None] for _ in range(MAX_SEARCH_DEPTH + 2)]
+        self._history = [None, [0] * cells, [0] * cells]
+        self._countermoves = [None, [None] * cells, [None] * cells]
+        self._cutoffs = 0
+        self._first_move_cutoffs = 0
+
+    def _staged_moves(self, player, tt_move, ply, last_idx):
+        """段階的な手の生成: 置換表の手 → キラー手 → カウンター手 → 残りをヒストリー順
+
+        前の段階でβカットが起きれば、残りの手の採点（quick_positional_score）はしない。
+        """
+        cells = self._cells
+        active = self._active_candidates()
+        tried = set()
+        
+        cheap = [tt_move]
+        cheap.extend(self._killers[ply])
+        if last_idx is not None:
+            cheap.append(self._countermoves[player][last_idx])
+        for move in cheap:
+            if move is not None and move not in tried and move in active and cells[move] == 0:
+                tried.add(move)
+                yield move
+        
+        history = self._history[player]
+        scored_moves = []
+        for move in active:
+            if move not in tried and cells[move] == 0:
+                r, c = divmod(move, self.size)
+                scored_moves.append((-history[move], -self.quick_positional_score(r, c, player), move))
+        scored_moves.sort()
+        for _, _, move in scored_moves:
+            yield move
+
+    def _record_cutoff(self, player, move, depth, ply, last_idx, index):
+        """βカットを起こした手をキラー手・ヒストリー・カウンター手に記録"""
+        self._cutoffs += 1
+        if index == 0:
+            self._first_move_cutoffs += 1
+        killers = self._killers[ply]
+        if killers[0] != move:
+            killers[1] = killers[0]
+            killers[0] = move
+        self._history[player][move] += depth * depth
+        if last_idx is not None:
+            self._countermoves[player][last_idx] = move
+    
+    def get_ordered_moves(self, player):
+        """評価値の高い順に手をソート（αβ枝刈りの効率化）"""
+        moves = self.get_candidate_moves()
+        if not moves:
+            return []
+        
+        scored_moves = []
+        for r, c in moves:
+            if self._cells[r * self.size + c] == 0:
+                # 仮置きしなくても全候補で同じだけずれるだけなので順序は変わらない
+                score = self.quick_positional_score(r, c, player)
+                scored_moves.append((-score, r, c))
+        
+        scored_moves.sort()
+        return [(r, c) for _, r, c in scored_moves]
+
+    def quick_positional_score(self, r, c, player):
+        """手の簡易位置評価（ソート用）"""
+        score = 0
+        
+        # 中央に近いほど高評価
+        center = self.size // 2
+        distance = abs(r - center) + abs(c - center)
+        score += max(0, 10 - distance) * 10
+        
+        # 既存の石の近くは高評価
+        for dr in range(-2, 3):
+            for dc in range(-2, 3):
+                nr, nc = r + dr, c + dc
+                if 0 <= nr < self.size and 0 <= nc < self.size:
+                    if self.board[nr][nc] == player:
+                        score += 50
+                    elif self.board[nr][nc] == (3 - player):
+                        score += 30
+        
+        return score
+    
+    def quick_evaluate(self, player):
+        """軽量評価関数（ミニマックス用）"""
+        # 5マス窓の集計値は着手のたびに差分更新しているので盤面は走査しない
+        if self._five_windows[player]:
+            return 100000
+        if self._five_windows[3 - player]:
+            return -100000
+        return self._threat_score[player] - self._threat_score[3 - player]
+
+    def evaluate_single_stone(self, r, c, player):
+        """単一の石の影響力を評価"""
+        if self.board[r][c] != player:
+            return 0
+        
+        back_table = RUN_BACK[player]
+        forward_table = RUN_FORWARD[player]
+        stone_value = 0
+        
+        for d in range(len(DIRECTIONS)):
+            code = self._window(r, c, d)
+            count = 1 + forward_table[code] + back_table[code]
+            
+            if count >= 5:
+                stone_value += 10000
+            elif count == 4:
+                stone_value += 1000
+            elif count == 3:
+                stone_value += 100
+            elif count == 2:
+                stone_value += 10
+        
+        return stone_value
+
+    def check_win_anywhere(self, player):
+        """盤面全体で勝利判定"""
+        if self.bitboard is not None:
+            return self.bitboard.has_five(player)
+        return self._five_windows[player] > 0
\ No newline at end of file
@@ -1,423 +1,775 @@
-import pygame
-import sys
-import os
-import math
-from engine import GomokuAnalyzer
-
-# Pygame設定
-CELL_SIZE = 40
-MARGIN = 50
-BOARD_SIZE = 15
-SCREEN_WIDTH = CELL_SIZE * (BOARD_SIZE - 1) + MARGIN * 2
-SCREEN_HEIGHT = SCREEN_WIDTH + 80
-INFO_AREA_HEIGHT = 80
-
-pygame.init()
-screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
-pygame.display.set_caption("五目並べ AI解析シミュレーター - 九州大学芸術工学部 編入プロジェクト")
-
-# 日本語フォントの設定
-def get_japanese_font(size):
-    """利用可能な日本語フォントを探す"""
-    font_paths = [
-        "C:/Windows/Fonts/msgothic.ttc",
-        "C:/Windows/Fonts/meiryo.ttc",
-        "C:/Windows/Fonts/yugothic.ttf",
-        "/System/Library/Fonts/ヒラギノ角ゴシック W4.ttc",
-        "/System/Library/Fonts/ヒラギノ丸ゴ ProN W4.ttc",
-        "/usr/share/fonts/truetype/takao-gothic/TakaoGothic.ttf",
-    ]
-    
-    for path in font_paths:
-        try:
-            if os.path.exists(path):
-                return pygame.font.Font(path, size)
-        except:
-            pass
-    
-    try:
-        return pygame.font.SysFont("meiryo", size)
-    except:
-        return pygame.font.SysFont(None, size)
-
-# フォントの初期化
-font_small = get_japanese_font(14)
-font_medium = get_japanese_font(18)
-font_large = get_japanese_font(24)
-font_title = get_japanese_font(28)
-
-
-def draw_board(analyzer, game_over, winner, modo=None, best_move_for_display=None):
-    """盤面と情報を描画（評価値表示付き）"""
-    
-    # 背景（グラデーション風）
-    for y in range(SCREEN_HEIGHT):
-        color_value = 220 - (y / SCREEN_HEIGHT * 20)
-        pygame.draw.line(screen, (color_value, 179, 92), (0, y), (SCREEN_WIDTH, y))
-    
-    # 情報表示エリアのy座標
-    info_y = SCREEN_HEIGHT - INFO_AREA_HEIGHT + 10
-    
-    # 盤面背景（木目調）
-    board_bg = pygame.Rect(
-        MARGIN - 15, MARGIN - 15,
-        CELL_SIZE * (BOARD_SIZE - 1) + 30,
-        CELL_SIZE * (BOARD_SIZE - 1) + 30
-    )
-    pygame.draw.rect(screen, (199, 155, 95), board_bg)
-    pygame.draw.rect(screen, (150, 110, 70), board_bg, 3)
-    
-    # 罫線を描画
-    for i in range(BOARD_SIZE):
-        # 横線
-        start_x, start_y = MARGIN, MARGIN + i * CELL_SIZE
-        end_x, end_y = SCREEN_WIDTH - MARGIN, start_y
-        pygame.draw.line(screen, (0, 0, 0), (start_x, start_y), (end_x, end_y), 2)
-        
-        # 縦線
-        start_x, start_y = MARGIN + i * CELL_SIZE, MARGIN
-        end_x, end_y = start_x, SCREEN_HEIGHT - INFO_AREA_HEIGHT - MARGIN
-        pygame.draw.line(screen, (0, 0, 0), (start_x, start_y), (end_x, end_y), 2)
-    
-    # 星のマーク（天元など）
-    stars = [(3, 3), (3, 11), (7, 7), (11, 3), (11, 11)]
-    for sr, sc in stars:
-        x = MARGIN + sc * CELL_SIZE
-        y = MARGIN + sr * CELL_SIZE
-        pygame.draw.circle(screen, (0, 0, 0), (x, y), 5)
-    
-    # スコア計算
-    scores = analyzer.evaluate_board()
-    
-    # 石と評価値の描画
-    for r in range(BOARD_SIZE):
-        for c in range(BOARD_SIZE):
-            x = MARGIN + c * CELL_SIZE
-            y = MARGIN + r * CELL_SIZE
-            
-            # 黒石の描画
-            if analyzer.board[r][c] == 1:
-                pygame.draw.circle(screen, (30, 30, 30), (x+2, y+2), 16)
-                pygame.draw.circle(screen, (20, 20, 20), (x, y), 16)
-                pygame.draw.circle(screen, (100, 100, 100), (x, y), 16, 2)
-            
-            # 白石の描画
-            elif analyzer.board[r][c] == 2:
-                pygame.draw.circle(screen, (230, 230, 230), (x+2, y+2), 16)
-                pygame.draw.circle(screen, (250, 250, 250), (x, y), 16)
-                pygame.draw.circle(screen, (200, 200, 200), (x, y), 16, 2)
-            
-            # 空マスの評価値表示
-            else:
-                should_display_score = False
-                if modo == "PvsAI" and analyzer.current_player == 2:
-                    # PvsAI：AI（白）の手番
-                    should_display_score = True
-                elif modo == "AIvsAI":
-                    # AIvsAI：常に表示
-                    should_display_score = True
-                elif modo == "AIvsHuman" and analyzer.current_player == 1:
-                    # AIvsHuman：AI（黒）の手番
-                    should_display_score = True
-                
-                if should_display_score:
-                    score_value = scores[r][c]
-                    
-                    if score_value > 0:
-                        # 対数スケールで正規化
-                        log_score = min(100, max(1, int(math.log10(score_value + 1) * 20)))
-                        
-                        # スコアに応じた色
-                        if log_score >= 90:
-                            color = (255, 50, 50)      # 赤
-                        elif log_score >= 70:
-                            color = (255, 150, 50)     # 橙
-                        elif log_score >= 50:
-                            color = (255, 255, 50)     # 黄
-                        elif log_score >= 30:
-                            color = (50, 200, 50)      # 緑
-                        elif log_score >= 10:
-                            color = (100, 150, 255)    # 青
-                        else:
-                            color = (150, 150, 150)    # 灰
-                        
-                        # 背景円（半透明）
-                        circle_surface = pygame.Surface((28, 28), pygame.SRCALPHA)
-                        pygame.draw.circle(circle_surface, (255, 255, 255, 200), (14, 14), 14)
-                        screen.blit(circle_surface, (x-14, y-14))
-                        
-                        # スコア数値表示
-                        score_text = font_small.render(str(log_score), True, color)
-                        text_rect = score_text.get_rect(center=(x, y))
-                        screen.blit(score_text, text_rect)
-    
-    # AIの最善手をハイライト
-    if best_move_for_display and not game_over:
-        br, bc = best_move_for_display
-        if analyzer.board[br][bc] == 0:
-            bx = MARGIN + bc * CELL_SIZE
-            by = MARGIN + br * CELL_SIZE
-            pulse = (pygame.time.get_ticks() // 300) % 2
-            if pulse:
-                pygame.draw.circle(screen, (255, 0, 0), (bx, by), 20, 3)
-    
-    # 情報表示エリア（下部）
-    info_rect = pygame.Rect(0, SCREEN_HEIGHT - INFO_AREA_HEIGHT, SCREEN_WIDTH, INFO_AREA_HEIGHT)
-    pygame.draw.rect(screen, (240, 240, 240), info_rect)
-    pygame.draw.line(screen, (180, 180, 180), (0, SCREEN_HEIGHT - INFO_AREA_HEIGHT), 
-                    (SCREEN_WIDTH, SCREEN_HEIGHT - INFO_AREA_HEIGHT), 2)
-    
-    # タイトル
-    title = font_title.render("五目並べ AI解析ツール", True, (0, 60, 120))
-    screen.blit(title, (SCREEN_WIDTH // 2 - title.get_width() // 2, 5))
-    
-    # 現在の手番
-    player_text = font_medium.render(f"現在の手番: {'黒' if analyzer.current_player == 1 else '白'}", 
-                                     True, (0, 0, 0))
-    screen.blit(player_text, (20, info_y))
-    
-    # 着手数
-    move_count = len(analyzer.move_history)
-    count_text = font_small.render(f"着手数: {move_count}", True, (0, 0, 0))
-    screen.blit(count_text, (20, info_y + 25))
-    
-    # 操作説明（右側）
-    controls = [
-        "【操作方法】",
-        "スペース: モード選択へ",
-        "ESC: 終了"
-    ]
-    
-    for i, text in enumerate(controls):
-        control_text = font_small.render(text, True, (80, 80, 80))
-        screen.blit(control_text, (SCREEN_WIDTH - 200, info_y + i * 20))
-    
-    # 評価値の凡例
-    legend_y = info_y + 40
-    legend_texts = [
-        ("赤(90-100): 勝ち確定", (255, 50, 50)),
-        ("橙(70-89): 強力", (255, 150, 50)),
-        ("黄(50-69): 良い", (255, 255, 50)),
-        ("緑(30-49): 普通", (50, 200, 50)),
-        ("青(10-29): 悪い", (100, 150, 255)),
-        ("灰(1-9): 最悪", (150, 150, 150))
-    ]
-    for i, (text, color) in enumerate(legend_texts):
-        legend = font_small.render(text, True, color)
-        screen.blit(legend, (SCREEN_WIDTH - 250, legend_y + i * 18))
-    
-    # ゲーム終了時の表示
-    if game_over and winner is not None:
-        # 半透明オーバーレイ
-        overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.SRCALPHA)
-        overlay.fill((0, 0, 0, 180))
-        screen.blit(overlay, (0, 0))
-        
-        # 勝利メッセージ
-        if winner == 0:
-            win_text = font_large.render("引き分け！", True, (255, 255, 0))
-        else:
-            winner_color = "黒" if winner == 1 else "白"
-            win_text = font_large.render(f"{winner_color}の勝利！", True, (255, 255, 0))
-        
-        text_rect = win_text.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 - 30))
-        screen.blit(win_text, text_rect)
-        
-        # リスタート指示
-        restart_text = font_medium.render("スペースキーで新しいゲームを開始", True, (255, 255, 255))
-        restart_rect = restart_text.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 + 20))
-        screen.blit(restart_text, restart_rect)
-        
-        # 総着手数
-        total_moves = font_small.render(f"総着手数: {len(analyzer.move_history)}手", True, (200, 200, 200))
-        total_rect = total_moves.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 + 50))
-        screen.blit(total_moves, total_rect)
-
-
-def draw_home_screen():
-    """ホーム画面の描画（3ボタン）"""
-    screen.fill((200, 220, 255))
-
-    btn_p_vs_ai = pygame.Rect(SCREEN_WIDTH // 2 - 100, SCREEN_HEIGHT // 2 - 40, 200, 50)
-    btn_ai_vs_ai = pygame.Rect(SCREEN_WIDTH // 2 - 100, SCREEN_HEIGHT // 2 + 30, 200, 50)
-    btn_ai_vs_human = pygame.Rect(SCREEN_WIDTH // 2 - 100, SCREEN_HEIGHT // 2 + 100, 200, 50)
-    
-    # タイトル
-    title = font_title.render("五目並べ AI解析シミュレーター", True, (0, 60, 120))
-    screen.blit(title, (SCREEN_WIDTH // 2 - title.get_width() // 2, SCREEN_HEIGHT // 4 - 60))
-    
-    # サブタイトル
-    subtitle = font_medium.render("九州大学芸術工学部 編入プロジェクト", True, (0, 0, 0))
-    screen.blit(subtitle, (SCREEN_WIDTH // 2 - subtitle.get_width() // 2, SCREEN_HEIGHT // 4))
-
-    # ボタン1：人間 vs AI（人間先手）
-    pygame.draw.rect(screen, (100, 150, 255), btn_p_vs_ai)
-    txt1 = font_medium.render("人間 vs AI (人間先手)", True, (255, 255, 255))
-    screen.blit(txt1, (btn_p_vs_ai.centerx - txt1.get_width() // 2, btn_p_vs_ai.centery - txt1.get_height() // 2))
-
-    # ボタン2：AI vs AI
-    pygame.draw.rect(screen, (100, 200, 150), btn_ai_vs_ai)
-    txt2 = font_medium.render("AI vs AI", True, (255, 255, 255))
-    screen.blit(txt2, (btn_ai_vs_ai.centerx - txt2.get_width() // 2, btn_ai_vs_ai.centery - txt2.get_height() // 2))
-
-    # ボタン3：AI vs Human（AI先手）
-    pygame.draw.rect(screen, (200, 150, 100), btn_ai_vs_human)
-    txt3 = font_medium.render("AI vs 人間 (AI先手)", True, (255, 255, 255))
-    screen.blit(txt3, (btn_ai_vs_human.centerx - txt3.get_width() // 2, btn_ai_vs_human.centery - txt3.get_height() // 2))
-
-    pygame.display.flip()
-    
-    while True:
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                pygame.quit()
-                sys.exit()
-
-            if event.type == pygame.MOUSEBUTTONDOWN:
-                pos = pygame.mouse.get_pos()
-                
-                if btn_p_vs_ai.collidepoint(pos):
-                    return "PvsAI"
-                elif btn_ai_vs_ai.collidepoint(pos):
-                    return "AIvsAI"
-                elif btn_ai_vs_human.collidepoint(pos):
-                    return "AIvsHuman"
-
-
-def main():
-    """メインゲームループ"""
-    analyzer = GomokuAnalyzer()
-    game_over = False
-    winner = None
-    modo = None
-    in_game = False
-    show_mode_select = True
-
-    clock = pygame.time.Clock()
-    
-    last_ai_move_time = 0
-    best_move_for_display = None
-
-    print("=" * 50)
-    print("五目並べ AI解析シミュレーター")
-    print("=" * 50)
-    
-    while True:
-        # モード選択画面
-        if show_mode_select:
-            modo = draw_home_screen()
-            analyzer = GomokuAnalyzer()
-            game_over = False
-            winner = None
-            in_game = True
-            show_mode_select = False
-            last_ai_move_time = pygame.time.get_ticks()
-            best_move_for_display = None
-            print(f"\n選択モード: {modo}")
-            print("ゲーム開始！")
-        
-        # イベント処理
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                pygame.quit()
-                sys.exit()
-            
-            if event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_ESCAPE:
-                    pygame.quit()
-                    sys.exit()
-                
-                elif event.key == pygame.K_SPACE:
-                    show_mode_select = True
-                    in_game = False
-                    continue
-            
-            # プレイヤーのクリック処理
-            if in_game and not game_over and event.type == pygame.MOUSEBUTTONDOWN:
-                mx, my = pygame.mouse.get_pos()
-                
-                # 盤面内のクリック判定
-                if (MARGIN <= mx <= SCREEN_WIDTH - MARGIN and 
-                    MARGIN <= my <= SCREEN_HEIGHT - INFO_AREA_HEIGHT - MARGIN):
-                    
-                    c = round((mx - MARGIN) / CELL_SIZE)
-                    r = round((my - MARGIN) / CELL_SIZE)
-                    
-                    if 0 <= r < BOARD_SIZE and 0 <= c < BOARD_SIZE:
-                        # モードに応じて人間の手番か判定
-                        human_turn = False
-                        if modo == "PvsAI" and analyzer.current_player == 1:
-                            human_turn = True
-                        elif modo == "AIvsHuman" and analyzer.current_player == 2:
-                            human_turn = True
-                        
-                        if human_turn and analyzer.put_stone(r, c, analyzer.current_player):
-                            print(f"人間 ({'黒' if analyzer.current_player == 1 else '白'}): ({r}, {c}) に着手")
-                            
-                            if analyzer.check_win(r, c, analyzer.current_player):
-                                winner = analyzer.current_player
-                                game_over = True
-                                in_game = False
-                                print(f"人間の勝利！")
-                            elif len(analyzer.move_history) == BOARD_SIZE * BOARD_SIZE:
-                                winner = 0
-                                game_over = True
-                                in_game = False
-                                print("引き分け！")
-                            else:
-                                # 手番交代
-                                analyzer.current_player = 3 - analyzer.current_player
-                                last_ai_move_time = pygame.time.get_ticks()
-                                best_move_for_display = None
-        
-        # ゲームロジック（AIのターン処理）
-        if in_game and not game_over:
-            current_time = pygame.time.get_ticks()
-            
-            # AIが手番かどうかの判定
-            ai_turn = False
-            if modo == "PvsAI" and analyzer.current_player == 2:
-                ai_turn = True
-            elif modo == "AIvsAI":
-                ai_turn = True  # AIvsAIでは常にどちらかのAIが手番
-            elif modo == "AIvsHuman" and analyzer.current_player == 1:
-                ai_turn = True
-            
-            if ai_turn and current_time - last_ai_move_time > 500:
-                # AIが手を打つ
-                best_move = analyzer.get_best_move()
-                best_move_for_display = best_move
-                
-                if best_move:
-                    r, c = best_move
-                    stone_player = analyzer.current_player
-                    
-                    if analyzer.put_stone(r, c, stone_player):
-                        player_name = "黒" if stone_player == 1 else "白"
-                        print(f"{player_name}(AI): ({r}, {c}) に着手")
-                        
-                        if analyzer.check_win(r, c, stone_player):
-                            winner = stone_player
-                            game_over = True
-                            in_game = False
-                            print(f"{player_name}の勝利！")
-                        elif len(analyzer.move_history) == BOARD_SIZE * BOARD_SIZE:
-                            winner = 0
-                            game_over = True
-                            in_game = False
-                            print("引き分け！")
-                        else:
-                            # 手番交代
-                            analyzer.current_player = 3 - analyzer.current_player
-                            best_move_for_display = None
-                
-                last_ai_move_time = current_time
-        
-        # 描画
-        draw_board(analyzer, game_over, winner, modo, best_move_for_display)
-        pygame.display.flip()
-        clock.tick(60)
-
-
-if __name__ == "__main__":
+import pygame
+import pygame.gfxdraw
+import sys
+import os
+import math
+from engine import GomokuAnalyzer, WIN_SCORE
+from pondering import BackgroundAnalysis, BackgroundSearch, Ponderer
+
+# Pygame設定
+CELL_SIZE = 40
+MARGIN = 50
+BOARD_SIZE = 15
+SCREEN_WIDTH = CELL_SIZE * (BOARD_SIZE - 1) + MARGIN * 2
+SCREEN_HEIGHT = SCREEN_WIDTH + 80
+INFO_AREA_HEIGHT = 80
+
+# AIが着手を始めるまでの待ち時間と、点滅表示の周期（ミリ秒）
+AI_MOVE_DELAY = 500
+PULSE_PERIOD = 300
+# AIの探索が終わったことをメインループに知らせるイベント
+AI_DONE_EVENT = pygame.USEREVENT + 1
+# 解析モード: 表示する上位の手の数と1局面あたりの解析時間（秒）。解析結果が更新されたイベント
+ANALYSIS_LINES = 5
+ANALYSIS_TIME_LIMIT = 10.0
+ANALYSIS_EVENT = pygame.USEREVENT + 2
+
+# 画面とフォント（init_display() で作る。import しただけでは pygame を初期化しない）
+screen = None
+font_small = None
+font_medium = None
+font_large = None
+font_title = None
+
+# 日本語フォントの設定
+def get_japanese_font(size):
+    """利用可能な日本語フォントを探す"""
+    font_paths = [
+        "C:/Windows/Fonts/msgothic.ttc",
+        "C:/Windows/Fonts/meiryo.ttc",
+        "C:/Windows/Fonts/yugothic.ttf",
+        "/System/Library/Fonts/ヒラギノ角ゴシック W4.ttc",
+        "/System/Library/Fonts/ヒラギノ丸ゴ ProN W4.ttc",
+        "/usr/share/fonts/truetype/takao-gothic/TakaoGothic.ttf",
+    ]
+    
+    for path in font_paths:
+        try:
+            if os.path.exists(path):
+                return pygame.font.Font(path, size)
+        except:
+            pass
+    
+    try:
+        return pygame.font.SysFont("meiryo", size)
+    except:
+        return pygame.font.SysFont(None, size)
+
+
+def init_display(headless=False):
+    """pygame を初期化して画面とフォントを作る
+
+    headless=True なら SDL の dummy ドライバを使い、ウィンドウを開かずに描画だけする
+    （対局の画像を保存する時など）。
+    """
+    global screen, font_small, font_medium, font_large, font_title
+    if screen is not None:
+        return screen
+    if headless:
+        os.environ["SDL_VIDEODRIVER"] = "dummy"
+    pygame.init()
+    screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+    pygame.display.set_caption("五目並べ AI解析シミュレーター - 九州大学芸術工学部 編入プロジェクト")
+    
+    # フォントの初期化
+    font_small = get_japanese_font(14)
+    font_medium = get_japanese_font(18)
+    font_large = get_japanese_font(24)
+    font_title = get_japanese_font(28)
+    return screen
+
+
+def game_result(analyzer, r, c, player):
+    """player が (r, c) に打った直後の勝敗。勝者（引き分けは 0）、続くなら None"""
+    if analyzer.check_win(r, c, player):
+        return player
+    if len(analyzer.move_history) == BOARD_SIZE * BOARD_SIZE:
+        return 0
+    return None
+
+
+def score_label(score_value):
+    """評価値を表示用の 1〜100 の値にする"""
+    # 対数スケールで正規化
+    return min(100, max(1, int(math.log10(score_value + 1) * 20)))
+
+
+def search_label(score):
+    """探索の評価値（手番側から見た値）を表示用の 1〜100 の値にする（50 が互角）"""
+    if score >= WIN_SCORE:
+        return 100
+    if score <= -WIN_SCORE:
+        return 1
+    # 正負それぞれ対数スケールで 50 から離す
+    offset = math.log10(abs(score) + 1) * 8
+    return min(100, max(1, int(50 + offset if score >= 0 else 50 - offset)))
+
+
+def analysis_labels(lines):
+    """解析結果の上位の手を [(x, y, 表示用の値), ...] にする"""
+    labels = []
+    for line in lines:
+        r, c = line['move']
+        labels.append((MARGIN + c * CELL_SIZE, MARGIN + r * CELL_SIZE, search_label(line['score'])))
+    return labels
+
+
+def analysis_status(lines):
+    """解析結果の情報表示（深さと最善の読み筋）"""
+    if not lines:
+        return "解析中"
+    best = lines[0]
+    pv = " ".join(f"({r},{c})" for r, c in best['pv'][:4])
+    return f"深さ{best['depth']} 評価値{best['score']} {pv}"
+
+
+def label_color(log_score):
+    """表示用の値に応じた色"""
+    if log_score >= 90:
+        color = (255, 50, 50)      # 赤
+    elif log_score >= 70:
+        color = (255, 150, 50)     # 橙
+    elif log_score >= 50:
+        color = (255, 255, 50)     # 黄
+    elif log_score >= 30:
+        color = (50, 200, 50)      # 緑
+    elif log_score >= 10:
+        color = (100, 150, 255)    # 青
+    else:
+        color = (150, 150, 150)    # 灰
+    return color
+
+
+class LabelAtlas:
+    """評価値ラベル（1〜100 の数字と半透明の背景円）を1枚にまとめた画像
+
+    色は値から決まるので、ラベルは100種類で足りる。1マスの描画は blit 1回になる。
+    """
+
+    LABEL_SIZE = 28
+    COLUMNS = 10
+
+    def __init__(self):
+        self.surface = None
+
+    def _area(self, log_score):
+        index = log_score - 1
+        size = self.LABEL_SIZE
+        return pygame.Rect(index % self.COLUMNS * size, index // self.COLUMNS * size, size, size)
+
+    def _build(self):
+        size = self.LABEL_SIZE
+        rows = (100 + self.COLUMNS - 1) // self.COLUMNS
+        self.surface = pygame.Surface((size * self.COLUMNS, size * rows), pygame.SRCALPHA)
+        for log_score in range(1, 101):
+            area = self._area(log_score)
+            # 背景円（半透明）とスコア数値
+            pygame.draw.circle(self.surface, (255, 255, 255, 200), area.center, size // 2)
+            score_text = font_small.render(str(log_score), True, label_color(log_score))
+            self.surface.blit(score_text, score_text.get_rect(center=area.center))
+
+    def blit(self, target, log_score, x, y):
+        """(x, y) を中心にラベルを描く"""
+        if self.surface is None:
+            self._build()
+        half = self.LABEL_SIZE // 2
+        target.blit(self.surface, (x - half, y - half), self._area(log_score))
+
+
+label_atlas = LabelAtlas()
+
+
+class HeatmapCache:
+    """評価値ヒートマップの計算結果を局面ごとに覚えておく
+
+    毎フレーム evaluate_board() を呼ばないよう、局面（Zobristハッシュ・手数・手番）と
+    モードが変わった時だけ作り直す。
+    """
+
+    def __init__(self):
+        self.key = None
+        self.labels = []
+
+    def get(self, analyzer, modo):
+        """[(x, y, 表示用の値), ...] を返す"""
+        key = (analyzer.zobrist_key, len(analyzer.move_history), analyzer.current_player, modo)
+        if key != self.key:
+            self.key = key
+            self.labels = self._build(analyzer, modo)
+        return self.labels
+
+    def _build(self, analyzer, modo):
+        should_display_score = False
+        if modo == "PvsAI" and analyzer.current_player == 2:
+            # PvsAI：AI（白）の手番
+            should_display_score = True
+        elif modo == "AIvsAI":
+            # AIvsAI：常に表示
+            should_display_score = True
+        elif modo == "AIvsHuman" and analyzer.current_player == 1:
+            # AIvsHuman：AI（黒）の手番
+            should_display_score = True
+        if not should_display_score:
+            return []
+        
+        scores = analyzer.evaluate_board()
+        labels = []
+        for r in range(BOARD_SIZE):
+            for c in range(BOARD_SIZE):
+                score_value = scores[r][c]
+                if analyzer.board[r][c] == 0 and score_value > 0:
+                    labels.append((MARGIN + c * CELL_SIZE, MARGIN + r * CELL_SIZE,
+                                   score_label(score_value)))
+        return labels
+
+
+heatmap_cache = HeatmapCache()
+
+
+def make_stone_sprite(fill, shadow, edge):
+    """アンチエイリアス付きの石の画像（影つき）を作る"""
+    radius = 16
+    size = CELL_SIZE
+    center = size // 2
+    sprite = pygame.Surface((size, size), pygame.SRCALPHA)
+    # 影（右下に2ピクセルずらす）
+    pygame.gfxdraw.filled_circle(sprite, center + 2, center + 2, radius, shadow)
+    pygame.gfxdraw.aacircle(sprite, center + 2, center + 2, radius, shadow)
+    # 石本体と縁
+    pygame.gfxdraw.filled_circle(sprite, center, center, radius, fill)
+    pygame.gfxdraw.aacircle(sprite, center, center, radius, edge)
+    pygame.gfxdraw.aacircle(sprite, center, center, radius - 1, edge)
+    return sprite
+
+
+class BoardRenderer:
+    """盤面の描画（静的な層は一度だけ描き、変わった矩形だけを返す）
+
+    層: 背景・盤・罫線・凡例など（静的） → 石 → 評価値（局面が変わった時だけ合成）
+    → 最善手の強調・手番などの文字・終局表示（毎フレームの状態と比べて描き直す）
+    """
+
+    def __init__(self):
+        self.static_layer = None
+        self.base = None
+        self.base_key = None
+        self.stone_sprites = None
+        # 前のフレームで描いた状態（None なら画面全体を描き直す）
+        self.highlight = None
+        self.info = None
+        self.ending = None
+        self.info_rect = pygame.Rect(10, SCREEN_HEIGHT - INFO_AREA_HEIGHT + 5, 380, INFO_AREA_HEIGHT - 10)
+
+    def invalidate(self):
+        """次のフレームで画面全体を描き直す（ホーム画面などで画面を上書きした後）"""
+        self.info = None
+
+    def _build_static_layer(self):
+        layer = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
+        
+        # 背景（グラデーション風）
+        for y in range(SCREEN_HEIGHT):
+            color_value = 220 - (y / SCREEN_HEIGHT * 20)
+            pygame.draw.line(layer, (color_value, 179, 92), (0, y), (SCREEN_WIDTH, y))
+        
+        # 情報表示エリアのy座標
+        info_y = SCREEN_HEIGHT - INFO_AREA_HEIGHT + 10
+        
+        # 盤面背景（木目調）
+        board_bg = pygame.Rect(
+            MARGIN - 15, MARGIN - 15,
+            CELL_SIZE * (BOARD_SIZE - 1) + 30,
+            CELL_SIZE * (BOARD_SIZE - 1) + 30
+        )
+        pygame.draw.rect(layer, (199, 155, 95), board_bg)
+        pygame.draw.rect(layer, (150, 110, 70), board_bg, 3)
+        
+        # 罫線を描画
+        for i in range(BOARD_SIZE):
+            # 横線
+            start_x, start_y = MARGIN, MARGIN + i * CELL_SIZE
+            end_x, end_y = SCREEN_WIDTH - MARGIN, start_y
+            pygame.draw.line(layer, (0, 0, 0), (start_x, start_y), (end_x, end_y), 2)
+            
+            # 縦線
+            start_x, start_y = MARGIN + i * CELL_SIZE, MARGIN
+            end_x, end_y = start_x, SCREEN_HEIGHT - INFO_AREA_HEIGHT - MARGIN
+            pygame.draw.line(layer, (0, 0, 0), (start_x, start_y), (end_x, end_y), 2)
+        
+        # 星のマーク（天元など）
+        stars = [(3, 3), (3, 11), (7, 7), (11, 3), (11, 11)]
+        for sr, sc in stars:
+            x = MARGIN + sc * CELL_SIZE
+            y = MARGIN + sr * CELL_SIZE
+            pygame.draw.circle(layer, (0, 0, 0), (x, y), 5)
+        
+        # 情報表示エリア（下部）
+        info_rect = pygame.Rect(0, SCREEN_HEIGHT - INFO_AREA_HEIGHT, SCREEN_WIDTH, INFO_AREA_HEIGHT)
+        pygame.draw.rect(layer, (240, 240, 240), info_rect)
+        pygame.draw.line(layer, (180, 180, 180), (0, SCREEN_HEIGHT - INFO_AREA_HEIGHT), 
+                        (SCREEN_WIDTH, SCREEN_HEIGHT - INFO_AREA_HEIGHT), 2)
+        
+        # タイトル
+        title = font_title.render("五目並べ AI解析ツール", True, (0, 60, 120))
+        layer.blit(title, (SCREEN_WIDTH // 2 - title.get_width() // 2, 5))
+        
+        # 操作説明（右側）
+        controls = [
+            "【操作方法】",
+            "スペース: モード選択へ",
+            "ESC: 終了"
+        ]
+        
+        for i, text in enumerate(controls):
+            control_text = font_small.render(text, True, (80, 80, 80))
+            layer.blit(control_text, (SCREEN_WIDTH - 200, info_y + i * 20))
+        
+        # 評価値の凡例
+        legend_y = info_y + 40
+        legend_texts = [
+            ("赤(90-100): 勝ち確定", (255, 50, 50)),
+            ("橙(70-89): 強力", (255, 150, 50)),
+            ("黄(50-69): 良い", (255, 255, 50)),
+            ("緑(30-49): 普通", (50, 200, 50)),
+            ("青(10-29): 悪い", (100, 150, 255)),
+            ("灰(1-9): 最悪", (150, 150, 150))
+        ]
+        for i, (text, color) in enumerate(legend_texts):
+            legend = font_small.render(text, True, color)
+            layer.blit(legend, (SCREEN_WIDTH - 250, legend_y + i * 18))
+        return layer
+
+    def _build_base(self, analyzer, modo, overlay):
+        """静的な層に石と評価値を重ねた画像を作る"""
+        if self.static_layer is None:
+            self.static_layer = self._build_static_layer()
+            self.stone_sprites = {
+                1: make_stone_sprite((20, 20, 20), (30, 30, 30), (100, 100, 100)),     # 黒石
+                2: make_stone_sprite((250, 250, 250), (230, 230, 230), (200, 200, 200)),  # 白石
+            }
+        base = self.static_layer.copy()
+        
+        # 石の描画
+        offset = CELL_SIZE // 2
+        for r, c, _ in analyzer.move_history:
+            stone = analyzer.board[r][c]
+            if stone:
+                base.blit(self.stone_sprites[stone],
+                          (MARGIN + c * CELL_SIZE - offset, MARGIN + r * CELL_SIZE - offset))
+        
+        # 空マスの評価値表示（局面が変わった時だけ計算し直す）。解析結果があればそちらを表示
+        labels = heatmap_cache.get(analyzer, modo) if overlay is None else overlay
+        for x, y, log_score in labels:
+            label_atlas.blit(base, log_score, x, y)
+        return base
+
+    def _draw_info(self, analyzer, game_over, thinking, status):
+        # 情報表示エリアのy座標
+        info_y = SCREEN_HEIGHT - INFO_AREA_HEIGHT + 10
+        
+        # 現在の手番
+        player_text = font_medium.render(f"現在の手番: {'黒' if analyzer.current_player == 1 else '白'}", 
+                                         True, (0, 0, 0))
+        screen.blit(player_text, (20, info_y))
+        
+        # 着手数
+        move_count = len(analyzer.move_history)
+        count_text = font_small.render(f"着手数: {move_count}", True, (0, 0, 0))
+        screen.blit(count_text, (20, info_y + 25))
+        
+        # AIの思考中表示（赤丸は探索中の暫定の最善手）
+        if thinking and not game_over:
+            dots = "." * ((pygame.time.get_ticks() // 300) % 4)
+            thinking_text = font_small.render(f"AI思考中{dots}", True, (200, 0, 0))
+            screen.blit(thinking_text, (20, info_y + 45))
+        
+        # 解析モードの深さと読み筋
+        if status and not game_over:
+            status_text = font_small.render(status, True, (0, 0, 160))
+            screen.blit(status_text, (20, info_y + 45))
+
+    def _draw_ending(self, analyzer, winner):
+        # 半透明オーバーレイ
+        overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.SRCALPHA)
+        overlay.fill((0, 0, 0, 180))
+        screen.blit(overlay, (0, 0))
+        
+        # 勝利メッセージ
+        if winner == 0:
+            win_text = font_large.render("引き分け！", True, (255, 255, 0))
+        else:
+            winner_color = "黒" if winner == 1 else "白"
+            win_text = font_large.render(f"{winner_color}の勝利！", True, (255, 255, 0))
+        
+        text_rect = win_text.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 - 30))
+        screen.blit(win_text, text_rect)
+        
+        # リスタート指示
+        restart_text = font_medium.render("スペースキーで新しいゲームを開始", True, (255, 255, 255))
+        restart_rect = restart_text.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 + 20))
+        screen.blit(restart_text, restart_rect)
+        
+        # 総着手数
+        total_moves = font_small.render(f"総着手数: {len(analyzer.move_history)}手", True, (200, 200, 200))
+        total_rect = total_moves.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 + 50))
+        screen.blit(total_moves, total_rect)
+
+    def _highlight_rect(self, move):
+        r, c = move
+        return pygame.Rect(MARGIN + c * CELL_SIZE - 21, MARGIN + r * CELL_SIZE - 21, 43, 43)
+
+    def render(self, analyzer, game_over, winner, modo, best_move_for_display, thinking,
+               overlay=None, status=None):
+        """画面に描き、更新した矩形のリストを返す（何も変わらなければ空）
+
+        overlay を渡すと評価値ヒートマップの代わりにそのラベル [(x, y, 表示用の値), ...] を描く。
+        """
+        ticks = pygame.time.get_ticks()
+        
+        # AIの最善手のハイライト（300msごとに点滅）
+        highlight = None
+        if best_move_for_display and not game_over:
+            br, bc = best_move_for_display
+            if analyzer.board[br][bc] == 0 and (ticks // 300) % 2:
+                highlight = (br, bc)
+        dots = (ticks // 300) % 4 if thinking and not game_over else None
+        info = (analyzer.current_player, len(analyzer.move_history), dots, status)
+        ending = winner if game_over else None
+        
+        base_key = (analyzer.zobrist_key, len(analyzer.move_history), analyzer.current_player, modo,
+                    None if overlay is None else tuple(overlay))
+        full = self.info is None or base_key != self.base_key or ending != self.ending
+        if base_key != self.base_key:
+            self.base = self._build_base(analyzer, modo, overlay)
+            self.base_key = base_key
+        
+        dirty = []
+        if full:
+            screen.blit(self.base, (0, 0))
+            self._draw_info(analyzer, game_over, thinking, status)
+            dirty.append(screen.get_rect())
+        else:
+            if highlight != self.highlight:
+                for move in (self.highlight, highlight):
+                    if move is not None:
+                        rect = self._highlight_rect(move)
+                        screen.blit(self.base, rect, rect)
+                        dirty.append(rect)
+            if info != self.info:
+                screen.blit(self.base, self.info_rect, self.info_rect)
+                self._draw_info(analyzer, game_over, thinking, status)
+                dirty.append(self.info_rect)
+        
+        if highlight is not None and (full or highlight != self.highlight):
+            bx = MARGIN + highlight[1] * CELL_SIZE
+            by = MARGIN + highlight[0] * CELL_SIZE
+            pygame.draw.circle(screen, (255, 0, 0), (bx, by), 20, 3)
+        
+        # ゲーム終了時の表示
+        if full and game_over and winner is not None:
+            self._draw_ending(analyzer, winner)
+        
+        self.highlight = highlight
+        self.info = info
+        self.ending = ending
+        return dirty
+
+
+board_renderer = BoardRenderer()
+
+
+def draw_board(analyzer, game_over, winner, modo=None, best_move_for_display=None, thinking=False,
+               overlay=None, status=None):
+    """盤面と情報を描画（評価値表示付き）。画面を更新した矩形のリストを返す"""
+    return board_renderer.render(analyzer, game_over, winner, modo, best_move_for_display, thinking,
+                                 overlay, status)
+
+
+def draw_home_screen():
+    """ホーム画面の描画（4ボタン）"""
+    screen.fill((200, 220, 255))
+
+    btn_p_vs_ai = pygame.Rect(SCREEN_WIDTH // 2 - 100, SCREEN_HEIGHT // 2 - 40, 200, 50)
+    btn_ai_vs_ai = pygame.Rect(SCREEN_WIDTH // 2 - 100, SCREEN_HEIGHT // 2 + 30, 200, 50)
+    btn_ai_vs_human = pygame.Rect(SCREEN_WIDTH // 2 - 100, SCREEN_HEIGHT // 2 + 100, 200, 50)
+    btn_analysis = pygame.Rect(SCREEN_WIDTH // 2 - 100, SCREEN_HEIGHT // 2 + 170, 200, 50)
+    
+    # タイトル
+    title = font_title.render("五目並べ AI解析シミュレーター", True, (0, 60, 120))
+    screen.blit(title, (SCREEN_WIDTH // 2 - title.get_width() // 2, SCREEN_HEIGHT // 4 - 60))
+    
+    # サブタイトル
+    subtitle = font_medium.render("九州大学芸術工学部 編入プロジェクト", True, (0, 0, 0))
+    screen.blit(subtitle, (SCREEN_WIDTH // 2 - subtitle.get_width() // 2, SCREEN_HEIGHT // 4))
+
+    # ボタン1：人間 vs AI（人間先手）
+    pygame.draw.rect(screen, (100, 150, 255), btn_p_vs_ai)
+    txt1 = font_medium.render("人間 vs AI (人間先手)", True, (255, 255, 255))
+    screen.blit(txt1, (btn_p_vs_ai.centerx - txt1.get_width() // 2, btn_p_vs_ai.centery - txt1.get_height() // 2))
+
+    # ボタン2：AI vs AI
+    pygame.draw.rect(screen, (100, 200, 150), btn_ai_vs_ai)
+    txt2 = font_medium.render("AI vs AI", True, (255, 255, 255))
+    screen.blit(txt2, (btn_ai_vs_ai.centerx - txt2.get_width() // 2, btn_ai_vs_ai.centery - txt2.get_height() // 2))
+
+    # ボタン3：AI vs Human（AI先手）
+    pygame.draw.rect(screen, (200, 150, 100), btn_ai_vs_human)
+    txt3 = font_medium.render("AI vs 人間 (AI先手)", True, (255, 255, 255))
+    screen.blit(txt3, (btn_ai_vs_human.centerx - txt3.get_width() // 2, btn_ai_vs_human.centery - txt3.get_height() // 2))
+
+    # ボタン4：解析モード（両方の石を人間が打ち、AIの読みを表示）
+    pygame.draw.rect(screen, (150, 120, 200), btn_analysis)
+    txt4 = font_medium.render("解析モード", True, (255, 255, 255))
+    screen.blit(txt4, (btn_analysis.centerx - txt4.get_width() // 2, btn_analysis.centery - txt4.get_height() // 2))
+
+    pygame.display.flip()
+    
+    while True:
+        # クリックされるまで眠って待つ
+        event = pygame.event.wait()
+        if event.type == pygame.QUIT:
+            pygame.quit()
+            sys.exit()
+
+        if event.type == pygame.MOUSEBUTTONDOWN:
+            pos = pygame.mouse.get_pos()
+            
+            if btn_p_vs_ai.collidepoint(pos):
+                return "PvsAI"
+            elif btn_ai_vs_ai.collidepoint(pos):
+                return "AIvsAI"
+            elif btn_ai_vs_human.collidepoint(pos):
+                return "AIvsHuman"
+            elif btn_analysis.collidepoint(pos):
+                return "Analysis"
+
+
+def is_ai_turn(modo, current_player):
+    """AIが手番かどうかの判定"""
+    if modo == "PvsAI" and current_player == 2:
+        return True
+    if modo == "AIvsAI":
+        return True  # AIvsAIでは常にどちらかのAIが手番
+    if modo == "AIvsHuman" and current_player == 1:
+        return True
+    return False
+
+
+def wait_timeout(ai_waiting, last_ai_move_time, animating):
+    """次に画面やゲームの状態が変わるまでのミリ秒（None ならイベントが来るまで待つ）"""
+    now = pygame.time.get_ticks()
+    timeouts = []
+    if ai_waiting:
+        # AIは前の手から500ms待ってから考え始める
+        timeouts.append(AI_MOVE_DELAY - (now - last_ai_move_time))
+    if animating:
+        # 最善手の点滅と思考中表示は300msごとに切り替わる
+        timeouts.append(PULSE_PERIOD - now % PULSE_PERIOD)
+    if not timeouts:
+        return None
+    # event.wait(0) は無期限に待つので最低1ms
+    return max(1, min(timeouts))
+
+
+def stop_ai(ai_search, ponderer, analysis=None):
+    """探索中・先読み中・解析中のスレッドをすぐに止める"""
+    for search in (ai_search, analysis):
+        if search is not None:
+            search.cancel()
+            search.wait()
+    if ponderer is not None:
+        ponderer.stop()
+
+
+def main():
+    """メインゲームループ"""
+    init_display()
+    analyzer = GomokuAnalyzer()
+    # 人間の考慮中に AI が先読みする（人間が対局するモードだけ）
+    ponderer = None
+    # AIの探索は別スレッドで行う（探索中はこのハンドルを持つ）
+    ai_search = None
+    # 解析モードの解析（と解析している局面）
+    analysis = None
+    analysis_position = None
+    game_over = False
+    winner = None
+    modo = None
+    in_game = False
+    show_mode_select = True
+
+    last_ai_move_time = 0
+    best_move_for_display = None
+
+    print("=" * 50)
+    print("五目並べ AI解析シミュレーター")
+    print("=" * 50)
+    
+    while True:
+        # モード選択画面
+        if show_mode_select:
+            modo = draw_home_screen()
+            analyzer.close()
+            analyzer = GomokuAnalyzer()
+            ponderer = Ponderer(analyzer) if modo in ("PvsAI", "AIvsHuman") else None
+            ai_search = None
+            analysis = None
+            board_renderer.invalidate()
+            game_over = False
+            winner = None
+            in_game = True
+            show_mode_select = False
+            last_ai_move_time = pygame.time.get_ticks()
+            best_move_for_display = None
+            print(f"\n選択モード: {modo}")
+            print("ゲーム開始！")
+        
+        # イベント処理（イベントが来るか、AIの待ち時間・点滅の切り替えまで眠る）
+        ai_waiting = (in_game and not game_over and ai_search is None
+                      and is_ai_turn(modo, analyzer.current_player))
+        animating = not game_over and (ai_search is not None or best_move_for_display is not None)
+        timeout = wait_timeout(ai_waiting, last_ai_move_time, animating)
+        first_event = pygame.event.wait() if timeout is None else pygame.event.wait(timeout)
+        for event in [first_event] + pygame.event.get():
+            if event.type == pygame.QUIT:
+                stop_ai(ai_search, ponderer, analysis)
+                analyzer.close()
+                pygame.quit()
+                sys.exit()
+            
+            if event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_ESCAPE:
+                    stop_ai(ai_search, ponderer, analysis)
+                    analyzer.close()
+                    pygame.quit()
+                    sys.exit()
+                
+                elif event.key == pygame.K_SPACE:
+                    # 探索中ならすぐに打ち切ってモード選択へ
+                    stop_ai(ai_search, ponderer, analysis)
+                    ai_search = None
+                    analysis = None
+                    show_mode_select = True
+                    in_game = False
+                    continue
+            
+            # プレイヤーのクリック処理
+            if in_game and not game_over and event.type == pygame.MOUSEBUTTONDOWN:
+                mx, my = pygame.mouse.get_pos()
+                
+                # 盤面内のクリック判定
+                if (MARGIN <= mx <= SCREEN_WIDTH - MARGIN and 
+                    MARGIN <= my <= SCREEN_HEIGHT - INFO_AREA_HEIGHT - MARGIN):
+                    
+                    c = round((mx - MARGIN) / CELL_SIZE)
+                    r = round((my - MARGIN) / CELL_SIZE)
+                    
+                    if 0 <= r < BOARD_SIZE and 0 <= c < BOARD_SIZE:
+                        # モードに応じて人間の手番か判定
+                        human_turn = False
+                        if modo == "PvsAI" and analyzer.current_player == 1:
+                            human_turn = True
+                        elif modo == "AIvsHuman" and analyzer.current_player == 2:
+                            human_turn = True
+                        elif modo == "Analysis":
+                            human_turn = True  # 解析モードでは両方の石を人間が打つ
+                        
+                        if human_turn and analyzer.put_stone(r, c, analyzer.current_player):
+                            print(f"人間 ({'黒' if analyzer.current_player == 1 else '白'}): ({r}, {c}) に着手")
+                            
+                            winner = game_result(analyzer, r, c, analyzer.current_player)
+                            if winner is not None:
+                                game_over = True
+                                in_game = False
+                                print("人間の勝利！" if winner else "引き分け！")
+                            if game_over:
+                                if ponderer is not None:
+                                    ponderer.stop()
+                            else:
+                                # 手番交代
+                                analyzer.current_player = 3 - analyzer.current_player
+                                last_ai_move_time = pygame.time.get_ticks()
+                                best_move_for_display = None
+                                # 先読みが当たっていれば待ち時間を置かずにその探索を使う
+                                if ponderer is not None:
+                                    ai_search = ponderer.take((r, c))
+                                    if ai_search is not None:
+                                        ai_search.on_finish = lambda: pygame.event.post(
+                                            pygame.event.Event(AI_DONE_EVENT))
+        
+        # ゲームロジック（AIのターン処理）
+        if in_game and not game_over:
+            current_time = pygame.time.get_ticks()
+            
+            # AIが手番かどうかの判定
+            ai_turn = is_ai_turn(modo, analyzer.current_player)
+            
+            if ai_turn and ai_search is None and current_time - last_ai_move_time >= AI_MOVE_DELAY:
+                # AIの探索を別スレッドで始める（AI同士の対局か、先読みが外れた時。待ち時間は見た目用）
+                ai_search = BackgroundSearch(analyzer)
+                # 探索が終わったらメインループを起こす
+                ai_search.on_finish = lambda: pygame.event.post(pygame.event.Event(AI_DONE_EVENT))
+                ai_search.start()
+            
+            if ai_search is not None:
+                best_move_for_display = ai_search.best_move
+            
+            if ai_search is not None and ai_search.finished:
+                # 探索が終わったら手を打つ
+                best_move = ai_search.result()
+                ai_search = None
+                best_move_for_display = best_move
+                
+                if best_move:
+                    r, c = best_move
+                    stone_player = analyzer.current_player
+                    
+                    if analyzer.put_stone(r, c, stone_player):
+                        player_name = "黒" if stone_player == 1 else "白"
+                        print(f"{player_name}(AI): ({r}, {c}) に着手")
+                        
+                        winner = game_result(analyzer, r, c, stone_player)
+                        if winner is not None:
+                            game_over = True
+                            in_game = False
+                            print(f"{player_name}の勝利！" if winner else "引き分け！")
+                        else:
+                            # 手番交代
+                            analyzer.current_player = 3 - analyzer.current_player
+                            best_move_for_display = None
+                            # 人間の考慮中に先読みしておく
+                            if ponderer is not None:
+                                ponderer.start()
+                
+                last_ai_move_time = current_time
+        
+        # 解析モード: 局面が変わるたびに読み直し、深さが1つ終わるごとに表示を更新する
+        if modo == "Analysis" and in_game:
+            position = (analyzer.zobrist_key, len(analyzer.move_history))
+            if analysis is None or analysis_position != position:
+                stop_ai(None, None, analysis)
+                analysis = BackgroundAnalysis(analyzer, ANALYSIS_LINES, ANALYSIS_TIME_LIMIT)
+                analysis.on_update = lambda: pygame.event.post(pygame.event.Event(ANALYSIS_EVENT))
+                analysis.start()
+                analysis_position = position
+        elif analysis is not None:
+            stop_ai(None, None, analysis)
+            analysis = None
+        
+        overlay = None
+        status = None
+        if analysis is not None:
+            # 静的評価のヒートマップの代わりに、探索で読んだ上位の手を表示する
+            overlay = analysis_labels(analysis.lines)
+            status = analysis_status(analysis.lines)
+            best_move_for_display = analysis.lines[0]['move'] if analysis.lines else None
+        
+        # 描画（変わった所だけ画面に反映）
+        dirty = draw_board(analyzer, game_over, winner, modo, best_move_for_display,
+                           thinking=ai_search is not None, overlay=overlay, status=status)
+        if dirty:
+            pygame.display.update(dirty)
+
+
+if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,224 @@
+import multiprocessing
+import time
+import weakref
+from concurrent.futures import FIRST_EXCEPTION, ProcessPoolExecutor, wait
+
+from search_control import SearchController
+
+from transposition import SharedTranspositionTable
+
+# 親が探索の終了を待つ間、中断要求を見に行く間隔（秒）
+POLL_INTERVAL = 0.01
+
+# ワーカープロセスごとの解析器と中断要求のイベント（initializer で一度だけ作る）
+_worker_analyzer = None
+_worker_cancel = None
+
+
+class _WorkerController(SearchController):
+    """親プロセスの中断要求（全ワーカーで共有するイベント）も見る SearchController"""
+
+    def __init__(self, cancel_event, **kwargs):
+        self._cancel_event = cancel_event
+        super().__init__(**kwargs)
+
+    @property
+    def cancelled(self):
+        return self._cancel_event.is_set()
+
+    @cancelled.setter
+    def cancelled(self, value):
+        if value:
+            self._cancel_event.set()
+
+
+def _init_worker(size, backend, tt_size_mb, candidate_radius, tt_name, cancel_event):
+    """ワーカー起動時に解析器を作り、共有置換表に接続しておく"""
+    global _worker_analyzer, _worker_cancel
+    # engine は parallel_search を import するので、ここで遅延 import する
+    from engine import GomokuAnalyzer
+    _worker_analyzer = GomokuAnalyzer(size, backend, tt_size_mb, candidate_radius)
+    _worker_analyzer.tt = SharedTranspositionTable(tt_size_mb, name=tt_name)
+    _worker_cancel = cancel_event
+
+
+def _ping(_):
+    return True
+
+
+def _shutdown_pool(executor, tt):
+    """ワーカーを止め、共有置換表を解放する（shutdown() か、ガベージコレクション・終了時に1回だけ呼ばれる）"""
+    executor.shutdown()
+    tt.close()
+    tt.unlink()
+
+
+def _search_task(history, current_player, weights, search_options, pv, root_moves,
+                 depth_limit, soft_time, hard_time, max_nodes, generation):
+    """ワーカー側: 局面を再現し、割り当てられたルートの手だけを読む"""
+    analyzer = _worker_analyzer
+    analyzer.weights = dict(weights)
+    analyzer.search_options = dict(search_options)
+    analyzer.load_position(history, current_player)
+    # 親の前回の読み筋（最初に読む手に使う）
+    analyzer._pv = pv
+    analyzer.tt.generation = generation
+    analyzer.tt.reset_stats()
+
+    controller = _WorkerController(_worker_cancel, soft_time=soft_time, hard_time=hard_time,
+                                   max_nodes=max_nodes)
+    controller.start()
+    best_move = analyzer.search_root_moves(root_moves, controller, depth_limit)
+    stats = dict(analyzer.search_stats)
+    # 最後に完了した深さの読み筋
+    stats['pv'] = analyzer._pv[1] if best_move is not None else None
+    # 共有置換表の参照・保存の回数はプロセスごとに数えているので、親で合計する
+    stats['tt'] = analyzer.tt.stats()
+    return stats
+
+
+class ParallelSearch:
+    """ルートの手を複数プロセスに分けて読むルート並列探索
+
+    ワーカーは ProcessPoolExecutor で起動したまま使い回す（warm worker）。
+    各ワーカーは手を交互に割り当てた部分集合を反復深化で読み、
+    全ワーカーが完了した一番深い深さで最も評価値の高い手を採用する。
+    置換表は全ワーカーで1つの共有メモリ上の表を使い、shutdown() まで残す。
+    親の controller の cancel() は共有のイベントでワーカーに伝え、全ワーカーを打ち切る。
+    shutdown() を呼ばずに捨てられた時も、ガベージコレクションかインタプリタの終了時に片付ける。
+    """
+
+    def __init__(self, workers, size=15, backend='array', tt_size_mb=4, candidate_radius=2):
+        self.workers = workers
+        self.tt = SharedTranspositionTable(tt_size_mb)
+        context = multiprocessing.get_context()
+        self.cancel_event = context.Event()
+        self.executor = ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                                            initializer=_init_worker,
+                                            initargs=(size, backend, tt_size_mb, candidate_radius,
+                                                      self.tt.name, self.cancel_event))
+        self._finalizer = weakref.finalize(self, _shutdown_pool, self.executor, self.tt)
+        self.warm_up()
+
+    def warm_up(self):
+        """全ワーカーを起動しておく（最初の探索で起動待ちが入らないように）"""
+        list(self.executor.map(_ping, range(self.workers)))
+
+    def shutdown(self):
+        self._finalizer()
+
+    def search(self, analyzer, root_moves, controller, depth_limit=None):
+        """analyzer の局面を root_moves について並列に読む。(最善手, 探索統計) を返す
+
+        controller は get_best_move で開始済みのもの。残り時間と残りノード数を
+        ワーカーに配るので、単一プロセスの探索と同じ予算で止まる。待っている間に
+        controller が cancel() されたら全ワーカーを打ち切る。最善手の読み筋は統計の 'pv'。
+        """
+        root_moves = list(root_moves)
+        chunks = [root_moves[i::self.workers] for i in range(self.workers)]
+        chunks = [chunk for chunk in chunks if chunk]
+        if not chunks:
+            return None, {'depth': 0, 'nodes': 0, 'workers': 0}
+
+        elapsed = controller.elapsed()
+        soft_time = None if controller.soft_time is None else max(0.0, controller.soft_time - elapsed)
+        hard_time = None if controller.hard_time is None else max(0.0, controller.hard_time - elapsed)
+        max_nodes = None
+        if controller.max_nodes is not None:
+            max_nodes = max(1, (controller.max_nodes - controller.nodes) // len(chunks))
+
+        start = time.time()
+        self.tt.new_search()
+        self.cancel_event.clear()
+        futures = [
+            self.executor.submit(_search_task, list(analyzer.move_history), analyzer.current_player,
+                                 analyzer.weights, analyzer.search_options, analyzer._pv, chunk,
+                                 depth_limit, soft_time, hard_time, max_nodes, self.tt.generation)
+            for chunk in chunks
+        ]
+        pending = futures
+        while pending:
+            if controller.cancelled:
+                self.cancel_event.set()
+            done, pending = wait(pending, timeout=POLL_INTERVAL, return_when=FIRST_EXCEPTION)
+            if any(future.exception() is not None for future in done):
+                # 1つでも失敗したら残りを打ち切ってから例外を伝える
+                self.cancel_event.set()
+                wait(pending)
+                break
+        results = [future.result() for future in futures]
+
+        # 全ワーカーが読み終えた深さでだけ評価値を比べる（深さが違う値は比べられない）
+        depth = min((stats['depth'] for stats in results), default=0)
+        best_move = None
+        best_score = -float('inf')
+        best_pv = None
+        for stats in results:
+            for iteration_depth, score, move in stats['iterations']:
+                if iteration_depth == depth and score > best_score:
+                    best_score = score
+                    best_move = move
+                    # ワーカーの読み筋は最後に完了した深さのものなので、最善手が同じ時だけ使う
+                    pv = stats['pv']
+                    best_pv = pv if pv and pv[0] == move else [move]
+
+        stats = {
+            'depth': depth,
+            'nodes': sum(stats['nodes'] for stats in results),
+            'time': controller.elapsed(),
+            'score': best_score,
+            'aborted': any(stats['aborted'] for stats in results),
+            'workers': len(chunks),
+            'worker_nodes': [stats['nodes'] for stats in results],
+            'worker_depths': [stats['depth'] for stats in results],
+            'tt': _merge_tt_stats([stats['tt'] for stats in results]),
+            'pv': best_pv,
+            'parallel_time': time.time() - start,
+        }
+        return best_move, stats
+
+
+def _merge_tt_stats(worker_stats):
+    """ワーカーごとの置換表の統計を合計する"""
+    merged = {'hits': 0, 'misses': 0, 'overwrites': 0, 'stores': 0}
+    for stats in worker_stats:
+        for key in merged:
+            merged[key] += stats[key]
+    probes = merged['hits'] + merged['misses']
+    merged['hit_rate'] = merged['hits'] / probes if probes else 0.0
+    return merged
+
+
+def measure_speedup(analyzer, workers, depth_limit=3):
+    """同じ局面・同じ深さで単一プロセスと並列探索の時間を比べる
+
+    get_best_move は急所検出や脅威空間探索で探索の前に返ることが多いので、
+    ルートの手の反復深化（search_root_moves と並列版）だけを測る。
+    戻り値は各方式の最善手・評価値・時間と speedup（単一の時間 / 並列の時間）。
+    """
+    saved_workers = analyzer.workers
+    report = {'workers': workers, 'depth': depth_limit}
+    root_moves = analyzer.get_ordered_moves(analyzer.current_player)
+    try:
+        for label, count in (('single', 1), ('parallel', workers)):
+            analyzer.workers = count
+            controller = SearchController()
+            if count > 1:
+                analyzer._get_parallel()  # プロセスの起動時間は測らない
+            start = time.time()
+            controller.start()
+            if count > 1:
+                move = analyzer._parallel_search(root_moves, controller, depth_limit)
+            else:
+                move = analyzer.search_root_moves(root_moves, controller, depth_limit)
+            report[label] = {
+                'move': move,
+                'score': analyzer.search_stats.get('score'),
+                'nodes': analyzer.search_stats.get('nodes'),
+                'time': time.time() - start,
+            }
+    finally:
+        analyzer.workers = saved_workers
+    parallel_time = report['parallel']['time']
+    report['speedup'] = report['single']['time'] / parallel_time if parallel_time else 0.0
+    return report
@@ -0,0 +1,108 @@
+import numpy as np
+
+# 9マス窓の各マスは2ビットで表す（0:空き, 1:黒, 2:白, 3:盤外）
+WINDOW_CELLS = 9
+WINDOW_CENTER = 4
+OFF_BOARD = 3
+WINDOW_MASK = (1 << (2 * WINDOW_CELLS)) - 1
+
+# パターン分類（強い順に大きい値）
+PATTERN_NONE = 0
+PATTERN_OPEN_TWO = 1
+PATTERN_DEAD_THREE = 2
+PATTERN_OPEN_THREE = 3
+PATTERN_DEAD_FOUR = 4
+PATTERN_OPEN_FOUR = 5
+PATTERN_FIVE = 6
+
+# 分類番号 -> weights のキー
+PATTERN_NAMES = (None, 'open_two', 'dead_three', 'open_three', 'dead_four', 'open_four', 'five')
+
+
+def _classify_string(s):
+    """従来の文字列マッチングで分類する（表の生成にのみ使用）"""
+    p = "1"
+    o = "0"
+    if p * 5 in s:
+        return PATTERN_FIVE
+    if f"{o}{p*4}{o}" in s:
+        return PATTERN_OPEN_FOUR
+    dead_four_patterns = [p*4, f"{p}{o}{p*3}", f"{p*3}{o}{p}", f"{p*2}{o}{p*2}"]
+    if any(pat in s for pat in dead_four_patterns):
+        return PATTERN_DEAD_FOUR
+    open_three_patterns = [
+        f"{o}{p*3}{o}",
+        f"{o}{p}{o}{p*2}{o}",
+        f"{o}{p*2}{o}{p}{o}",
+        f"{o}{p}{o}{p}{o}{p}{o}",
+        f"{o}{p*2}{o}{p}{o}{p}{o}",
+    ]
+    if any(pat in s for pat in open_three_patterns):
+        return PATTERN_OPEN_THREE
+    if p * 3 in s:
+        return PATTERN_DEAD_THREE
+    if f"{o}{p*2}{o}" in s:
+        return PATTERN_OPEN_TWO
+    return PATTERN_NONE
+
+
+def _build_relative_table():
+    """中央以外の8マスを (空き/自石/それ以外) の3値で見た 3^8 通りを分類"""
+    chars = "01X"
+    table = np.zeros(3 ** 8, dtype=np.uint8)
+    for index in range(3 ** 8):
+        cells = []
+        rest = index
+        for _ in range(8):
+            cells.append(chars[rest % 3])
+            rest //= 3
+        s = "".join(cells[:WINDOW_CENTER]) + "1" + "".join(cells[WINDOW_CENTER:])
+        table[index] = _classify_string(s)
+    return table
+
+
+def _build_tables():
+    """4^9 通りの窓コードを手番ごとに分類した表を作る"""
+    relative = _build_relative_table()
+    codes = np.arange(1 << (2 * WINDOW_CELLS), dtype=np.int64)
+    tables = [None, None, None]
+    for player in (1, 2):
+        index = np.zeros_like(codes)
+        power = 1
+        for j in range(WINDOW_CELLS):
+            if j == WINDOW_CENTER:
+                continue
+            digit = (codes >> (2 * j)) & 3
+            rel = np.where(digit == 0, 0, np.where(digit == player, 1, 2))
+            index += rel * power
+            power *= 3
+        tables[player] = relative[index]
+    return tables
+
+
+# PATTERN_TABLES[player] は numpy 配列（一括評価用）
+# PATTERN_CLASS[player] は bytes（1要素ずつ引くときはこちらが速い）
+PATTERN_TABLES = _build_tables()
+PATTERN_CLASS = [None] + [PATTERN_TABLES[p].tobytes() for p in (1, 2)]
+
+
+def _build_run_tables():
+    """中央から各方向へ連続する自石の数（最大4）を手番ごとに求める"""
+    codes = np.arange(1 << (2 * WINDOW_CELLS), dtype=np.int64)
+    left = [None, None, None]
+    right = [None, None, None]
+    for player in (1, 2):
+        for side, step in ((left, -1), (right, 1)):
+            run = np.zeros_like(codes)
+            alive = np.ones(codes.shape, dtype=bool)
+            for i in range(1, WINDOW_CENTER + 1):
+                digit = (codes >> (2 * (WINDOW_CENTER + step * i))) & 3
+                alive &= digit == player
+                run += alive
+            side[player] = run.astype(np.uint8).tobytes()
+    return left, right
+
+
+# RUN_BACK[player][code] / RUN_FORWARD[player][code]
+# 中央の負方向・正方向に連続する player の石の数
+RUN_BACK, RUN_FORWARD = _build_run_tables()
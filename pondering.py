@@ -0,0 +1,190 @@
+import threading
+
+from engine import DEFAULT_TIME_LIMIT
+from search_control import SearchController
+
+
+class BackgroundSearch:
+    """get_best_move を別スレッドで実行する（cancel() ですぐに打ち切れる）
+
+    探索は analyzer.clone() した解析器で行うので、元の解析器はそのまま描画などに使える。
+    history を渡すとその局面（着手履歴と手番）を読む。time_limit=None なら cancel() まで読み続ける。
+    """
+
+    def __init__(self, analyzer, time_limit=DEFAULT_TIME_LIMIT, history=None, current_player=None):
+        self.source = analyzer
+        self.analyzer = analyzer.clone()
+        if history is not None:
+            self.analyzer.load_position(history, current_player)
+        self.controller = SearchController()
+        self.set_time_limit(time_limit)
+        self.move = None
+        self.stats = {}
+        self.started = False
+        self.finished = False
+        # 探索が終わった時に（探索したスレッドで）呼ぶ関数
+        self.on_finish = None
+        self._thread = None
+
+    def set_time_limit(self, time_limit):
+        """持ち時間を（探索の開始時刻から数えて）設定し直す。None なら無制限"""
+        if time_limit is None:
+            self.controller.soft_time = None
+            self.controller.hard_time = None
+        else:
+            # get_best_move と同じく、半分を過ぎたら次の深さは始めない
+            self.controller.soft_time = time_limit * 0.5
+            self.controller.hard_time = time_limit
+
+    def run(self):
+        """呼び出したスレッドで探索する"""
+        self.started = True
+        self.move = self.analyzer.get_best_move(controller=self.controller)
+        self.stats = self.analyzer.search_stats
+        self.finished = True
+        if self.on_finish is not None:
+            self.on_finish()
+        return self.move
+
+    def start(self):
+        """別スレッドで探索を始める"""
+        self._thread = threading.Thread(target=self.run, daemon=True)
+        self._thread.start()
+        return self
+
+    def cancel(self):
+        self.controller.cancel()
+
+    @property
+    def best_move(self):
+        """探索中の暫定の最善手（完了した一番深い深さの結果）"""
+        return self.move if self.finished else self.analyzer.current_best
+
+    def result(self):
+        """終わった探索の最善手。読み筋と統計は元の解析器に書き戻す（次の先読みの予想に使う）"""
+        self.source._pv = self.analyzer._pv
+        self.source.search_stats = self.stats
+        return self.move
+
+    def wait(self, timeout=None):
+        """探索の終了を待つ。終わっていれば True"""
+        if self._thread is not None:
+            self._thread.join(timeout)
+        return self.finished
+
+
+class BackgroundAnalysis(BackgroundSearch):
+    """iter_analysis を別スレッドで実行し、上位 k 手の評価値と読み筋を深さごとに更新する
+
+    lines は完了した一番深い深さの結果（まだ無ければ空）。on_update は深さが1つ終わるたびに
+    （探索したスレッドで）呼ぶ。k と time_limit で、表示までの速さと読む手の幅を調整する。
+    """
+
+    def __init__(self, analyzer, k=3, time_limit=DEFAULT_TIME_LIMIT):
+        super().__init__(analyzer, time_limit)
+        self.k = k
+        self.lines = []
+        self.on_update = None
+
+    def run(self):
+        """呼び出したスレッドで解析する"""
+        self.started = True
+        for lines in self.analyzer.iter_analysis(self.k, controller=self.controller):
+            self.lines = lines
+            if self.on_update is not None:
+                self.on_update()
+        self.move = self.lines[0]['move'] if self.lines else None
+        self.stats = self.analyzer.search_stats
+        self.finished = True
+        if self.on_finish is not None:
+            self.on_finish()
+        return self.lines
+
+
+class Ponderer:
+    """相手の考慮時間中に、予想した相手の応手の後の局面を先読みしておく
+
+    AI が着手した直後（相手の手番）に start() を呼び、相手が着手したら take() で
+    探索を受け取る。予想が当たれば（ponder hit）その探索を返す。読み終えていればすぐに
+    result() が取れ、読んでいる途中なら先読みを始めてからの時間を持ち時間に含めて続けさせる。
+    外れた時は None を返すので、呼び出し側で通常どおり探索する（置換表は温まっている）。
+    max_replies > 1 なら予想の上位から順に1手ずつ time_limit ずつ読む。
+    """
+
+    def __init__(self, analyzer, max_replies=1, time_limit=DEFAULT_TIME_LIMIT):
+        self.analyzer = analyzer
+        self.max_replies = max_replies
+        self.time_limit = time_limit
+        # 予想した応手 (r, c) -> BackgroundSearch
+        self.searches = {}
+        self.hits = 0
+        self.misses = 0
+        self._thread = None
+        self._stopped = False
+
+    def predict_replies(self):
+        """相手の応手の予想（前回の読み筋の続き → 手の順序付けの上位）"""
+        analyzer = self.analyzer
+        replies = []
+        pv_reply = analyzer._pv_move()
+        if pv_reply is not None:
+            replies.append(pv_reply)
+        for move in analyzer.get_ordered_moves(analyzer.current_player):
+            if len(replies) >= self.max_replies:
+                break
+            if move not in replies:
+                replies.append(move)
+        return replies
+
+    def start(self):
+        """相手の手番になった局面から先読みを始める"""
+        self.stop()
+        analyzer = self.analyzer
+        opponent = analyzer.current_player
+        # 局面の複製はここ（メインスレッド）で作っておく
+        for r, c in self.predict_replies():
+            history = analyzer.move_history + [(r, c, opponent)]
+            time_limit = None if self.max_replies == 1 else self.time_limit
+            self.searches[(r, c)] = BackgroundSearch(analyzer, time_limit, history, 3 - opponent)
+        self._stopped = False
+        self._thread = threading.Thread(target=self._run, args=(list(self.searches.values()),),
+                                        daemon=True)
+        self._thread.start()
+
+    def _run(self, searches):
+        for search in searches:
+            if self._stopped:
+                break
+            search.run()
+
+    def stop(self):
+        """先読みを打ち切り、スレッドの終了を待つ"""
+        self._stopped = True
+        for search in self.searches.values():
+            search.cancel()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.searches = {}
+
+    def take(self, move):
+        """相手が move を打った後に呼ぶ。予想が当たればその BackgroundSearch、外れれば None
+
+        当たった探索が終わるのは待たない（finished を見て result() を取る）。
+        """
+        search = self.searches.get(move)
+        if search is None or not search.started:
+            self.misses += 1
+            self.stop()
+            return None
+        self.hits += 1
+        self._stopped = True
+        for other in self.searches.values():
+            if other is not search:
+                other.cancel()
+        if not search.finished:
+            # 先読みを始めてからの時間も持ち時間に含めて、残りの時間だけ読ませる
+            search.set_time_limit(self.time_limit)
+        # 先読みのスレッドはこの探索を終えたら止まる（次の start() か stop() で回収）
+        self.searches = {}
+        return search
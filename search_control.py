@@ -0,0 +1,63 @@
+import time
+
+
+class SearchAborted(Exception):
+    """探索の打ち切り（時間・ノード数の上限、または中断要求）"""
+
+
+class SearchController:
+    """反復深化の時間・ノード数の管理
+
+    soft_time: これを過ぎたら次の深さを始めない（秒）
+    hard_time: これを過ぎたら探索中でも打ち切る（秒）
+    max_nodes: ノード数の上限。時間に依存しないので GA の対局やベンチマークを再現できる
+    """
+
+    def __init__(self, soft_time=None, hard_time=None, max_nodes=None, check_interval=256):
+        self.soft_time = soft_time
+        self.hard_time = hard_time
+        self.max_nodes = max_nodes
+        # 時計は check_interval ノードごとにだけ見る（2のべき乗）
+        self._check_mask = check_interval - 1
+        self.nodes = 0
+        self.start_time = time.time()
+        self.cancelled = False
+        self.aborted = False
+
+    def start(self):
+        # 開始前に届いた cancel() は取り消さない
+        self.nodes = 0
+        self.start_time = time.time()
+        self.aborted = False
+
+    def elapsed(self):
+        return time.time() - self.start_time
+
+    def cancel(self):
+        """別スレッドなどから探索を中断させる"""
+        self.cancelled = True
+
+    def tick(self):
+        """ノードを1つ数え、上限を超えていれば SearchAborted を送出する"""
+        self.nodes += 1
+        if self.max_nodes is not None and self.nodes > self.max_nodes:
+            self._abort()
+        if self.nodes & self._check_mask == 0:
+            if self.cancelled:
+                self._abort()
+            if self.hard_time is not None and time.time() - self.start_time > self.hard_time:
+                self._abort()
+
+    def _abort(self):
+        self.aborted = True
+        raise SearchAborted()
+
+    def can_start_iteration(self):
+        """次の深さの探索を始めてよいか"""
+        if self.cancelled:
+            return False
+        if self.max_nodes is not None and self.nodes >= self.max_nodes:
+            return False
+        if self.soft_time is not None and self.elapsed() > self.soft_time:
+            return False
+        return True
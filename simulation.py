@@ -0,0 +1,198 @@
+import argparse
+import json
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from engine import GomokuAnalyzer
+from main import BOARD_SIZE, game_result
+
+# 初期局面をばらけさせる時に、ランダムに打つ範囲（中央からのマス数）
+OPENING_RADIUS = 2
+
+
+def load_engine_spec(name, weights_path=None, search_options=None):
+    """対局させるエンジンの設定。weights_path は best_weights.txt と同じ形式の JSON"""
+    spec = {'name': name, 'weights': None, 'search_options': search_options}
+    if weights_path is not None:
+        with open(weights_path, 'r', encoding='utf-8') as f:
+            spec['weights'] = json.load(f)
+    return spec
+
+
+def make_engine(spec):
+    analyzer = GomokuAnalyzer(search_options=spec.get('search_options'))
+    if spec.get('weights'):
+        analyzer.weights.update(spec['weights'])
+    return analyzer
+
+
+def random_opening(rng, plies):
+    """中央付近にランダムに plies 手打った着手履歴 [(r, c, player), ...]"""
+    center = BOARD_SIZE // 2
+    cells = [(r, c)
+             for r in range(center - OPENING_RADIUS, center + OPENING_RADIUS + 1)
+             for c in range(center - OPENING_RADIUS, center + OPENING_RADIUS + 1)]
+    moves = rng.sample(cells, plies)
+    return [(r, c, 1 + i % 2) for i, (r, c) in enumerate(moves)]
+
+
+def play_game(black, white, opening=(), depth_limit=None, time_limit=None, node_limit=None,
+              frame_dir=None, frame_prefix='game'):
+    """black（先手）と white（後手）のエンジン設定で1局打ち、棋譜の dict を返す
+
+    両者は別々の解析器で読む（置換表などは共有しない）。frame_dir を渡すと
+    1手ごとに GUI と同じ盤面を SDL の dummy ドライバで描いて PNG に保存する。
+    """
+    engines = {1: make_engine(black), 2: make_engine(white)}
+    if frame_dir is not None:
+        import pygame
+        import main as gui
+        gui.init_display(headless=True)
+        os.makedirs(frame_dir, exist_ok=True)
+
+    moves = []
+    winner = None
+    start = time.time()
+
+    def play(r, c, player):
+        for analyzer in engines.values():
+            analyzer.put_stone(r, c, player)
+            analyzer.current_player = 3 - player
+        moves.append([r, c])
+        result = game_result(engines[player], r, c, player)
+        if frame_dir is not None:
+            gui.draw_board(engines[player], result is not None, result)
+            pygame.image.save(gui.screen, os.path.join(frame_dir, f"{frame_prefix}_{len(moves):03d}.png"))
+        return result
+
+    try:
+        for r, c, player in opening:
+            winner = play(r, c, player)
+        player = 1 + len(moves) % 2
+        while winner is None:
+            move = engines[player].get_best_move(depth_limit=depth_limit, time_limit=time_limit,
+                                                 node_limit=node_limit)
+            if move is None:
+                winner = 0  # 打つ場所が無い
+                break
+            winner = play(move[0], move[1], player)
+            player = 3 - player
+    finally:
+        for analyzer in engines.values():
+            analyzer.close()
+
+    return {
+        'black': black['name'],
+        'white': white['name'],
+        'winner': winner,
+        'opening': len(opening),
+        'moves': moves,
+        'time': time.time() - start,
+    }
+
+
+def _play_task(args):
+    index, black, white, opening, limits, frame_dir = args
+    record = play_game(black, white, opening, frame_dir=frame_dir,
+                       frame_prefix=f"game{index:03d}", **limits)
+    record['game'] = index
+    return record
+
+
+def run_games(engine_a, engine_b, games, opening_plies=2, seed=0, depth_limit=None,
+              time_limit=None, node_limit=None, jobs=1, record_path=None,
+              frame_dir=None, render_games=()):
+    """engine_a と engine_b を先後交互に games 局対戦させ、棋譜のリストを返す
+
+    待ち時間も描画も無しで打つ。初期局面は seed から決まるランダムな opening_plies 手で、
+    同じ初期局面を先後入れ替えて2局ずつ打つ。jobs > 1 なら対局をプロセスに分けて並行に打つ。
+    record_path を渡すと棋譜を1局1行の JSON で書き出し、render_games に含まれる
+    番号の対局は frame_dir に1手ごとの画像を保存する。
+    """
+    rng = random.Random(seed)
+    limits = {'depth_limit': depth_limit, 'time_limit': time_limit, 'node_limit': node_limit}
+    tasks = []
+    opening = []
+    for index in range(games):
+        if index % 2 == 0:
+            opening = random_opening(rng, opening_plies)
+        black, white = (engine_a, engine_b) if index % 2 == 0 else (engine_b, engine_a)
+        frames = frame_dir if index in render_games else None
+        tasks.append((index, black, white, opening, limits, frames))
+
+    if jobs > 1:
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            records = executor.map(_play_task, tasks)
+            records = list(_report(records, games))
+    else:
+        records = list(_report(map(_play_task, tasks), games))
+
+    if record_path is not None:
+        with open(record_path, 'w', encoding='utf-8') as f:
+            for record in records:
+                f.write(json.dumps(record, ensure_ascii=False) + '\n')
+    return records
+
+
+def _report(records, games):
+    """終わった対局を1行ずつ表示しながら流す"""
+    for record in records:
+        winner = {0: '引き分け', 1: record['black'], 2: record['white']}[record['winner']]
+        print(f"[{record['game'] + 1}/{games}] {record['black']}(黒) vs {record['white']}(白): "
+              f"{winner} ({len(record['moves'])}手, {record['time']:.1f}秒)")
+        yield record
+
+
+def summarize(records, names):
+    """エンジンごとの勝ち数（先手・後手別）と引き分け数"""
+    summary = {name: {'first': 0, 'second': 0} for name in names}
+    summary['draw'] = 0
+    for record in records:
+        if record['winner'] == 0:
+            summary['draw'] += 1
+        elif record['winner'] == 1:
+            summary[record['black']]['first'] += 1
+        else:
+            summary[record['white']]['second'] += 1
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="画面を使わずに AI 同士を連続で対戦させる")
+    parser.add_argument('--games', type=int, default=10)
+    parser.add_argument('--weights-a', help="エンジンAの重み（JSON）。省略時は初期値")
+    parser.add_argument('--weights-b', help="エンジンBの重み（JSON）。省略時は初期値")
+    parser.add_argument('--depth', type=int, default=None, help="探索深さを固定する")
+    parser.add_argument('--time', type=float, default=None, help="1手の秒数（省略時はエンジンの既定）")
+    parser.add_argument('--nodes', type=int, default=None, help="1手のノード数の上限")
+    parser.add_argument('--opening', type=int, default=2, help="初期局面のランダムな手数")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--jobs', type=int, default=1, help="並行に打つ対局数")
+    parser.add_argument('--records', default="game_records.jsonl", help="棋譜の出力先")
+    parser.add_argument('--frames', default="frames", help="画像の保存先")
+    parser.add_argument('--render', type=int, nargs='*', default=[],
+                        help="画像を保存する対局の番号（0から）")
+    args = parser.parse_args()
+
+    engine_a = load_engine_spec("A", args.weights_a)
+    engine_b = load_engine_spec("B", args.weights_b)
+    start = time.time()
+    records = run_games(engine_a, engine_b, args.games, opening_plies=args.opening, seed=args.seed,
+                        depth_limit=args.depth, time_limit=args.time, node_limit=args.nodes,
+                        jobs=args.jobs, record_path=args.records, frame_dir=args.frames,
+                        render_games=set(args.render))
+    summary = summarize(records, ("A", "B"))
+
+    print("\n=== 対戦結果 ===")
+    for name in ("A", "B"):
+        wins = summary[name]
+        print(f"エンジン{name}: {wins['first'] + wins['second']}勝 "
+              f"(先手:{wins['first']}, 後手:{wins['second']})")
+    print(f"引分: {summary['draw']}")
+    print(f"{len(records)}局 {time.time() - start:.1f}秒、棋譜: {args.records}")
+
+
+if __name__ == "__main__":
+    main()
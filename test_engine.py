@@ -0,0 +1,32 @@
+import numpy as np
+
+from engine import GomokuAnalyzer
+
+
+def _assert_score_map_fresh(analyzer):
+    for player in (1, 2):
+        np.testing.assert_allclose(analyzer.get_score_map(player),
+                                   analyzer.evaluate_board_enhanced(player))
+
+
+def test_score_map_after_unmake_and_other_colour():
+    """取り消したマスに反対の色を打ち直しても、差分更新の評価値マップが一から計算した値と一致する"""
+    analyzer = GomokuAnalyzer()
+    for r, c, player in [(7, 7, 1), (7, 8, 2), (8, 8, 1), (6, 6, 2), (9, 9, 1)]:
+        analyzer.put_stone(r, c, player)
+    analyzer.get_score_map(1)
+    analyzer.unmake_move()
+    analyzer.put_stone(9, 9, 2)
+    _assert_score_map_fresh(analyzer)
+
+
+def test_unmake_after_load_position():
+    """load_position で作った局面から unmake_move すると、取り消した手を打った側の手番に戻る"""
+    history = [(7, 7, 1), (7, 8, 2), (8, 8, 1), (6, 6, 2)]
+    analyzer = GomokuAnalyzer()
+    analyzer.load_position(history, 1)
+    analyzer.unmake_move()
+    assert analyzer.current_player == 2
+    analyzer.unmake_move()
+    assert analyzer.current_player == 1
+    assert analyzer.move_history == history[:2]
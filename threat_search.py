@@ -0,0 +1,196 @@
+from pattern_table import PATTERN_DEAD_FOUR, PATTERN_OPEN_THREE
+
+MODE_VCF = 'vcf'
+MODE_VCT = 'vct'
+
+
+class _BudgetExceeded(Exception):
+    """ノード数・時間の予算切れ"""
+
+
+class ThreatSpaceSearch:
+    """四（VCF）または三と四（VCT）の連続だけを読む脅威空間探索
+
+    攻め方は四・三を作る手だけ、受け方は五を止める手（三に対しては活四・四四になるマスと
+    自分の四）だけを読むので、分岐が少なく10〜15手の必勝手順でもすぐに見つかる。
+    VCT の受けは候補を絞っているので、見つかった手順は「有力な勝ち筋」として扱う。
+    予算（max_nodes）は作った時から数え、全ての find() で共有する。使い切った後の find() は
+    すぐに None を返し、exhausted が True になる（「勝ち手順が無い」とは区別する）。
+    controller を渡すと読んだノードをその SearchController の tick() にも数えるので、
+    ノード数の上限・持ち時間・cancel() で SearchAborted が送出される。
+    """
+
+    def __init__(self, analyzer, max_nodes=3000, max_depth=8, controller=None):
+        self.analyzer = analyzer
+        self.max_nodes = max_nodes
+        self.controller = controller
+        # 攻め方の着手数の上限（受けを含めると 2 * max_depth 手）
+        self.max_depth = max_depth
+        # (Zobristキー, 攻め方, モード) -> (深さ, 手順 or None)
+        self.cache = {}
+        self.nodes = 0
+        self.exhausted = False
+
+    def find_vcf(self, player):
+        """player が四の連続で勝つ手順を返す。見つからなければ None"""
+        return self.find(player, MODE_VCF)
+
+    def find_vct(self, player):
+        """player が三・四の連続で勝つ手順を返す。見つからなければ None"""
+        return self.find(player, MODE_VCT)
+
+    def find(self, player, mode):
+        """player の手番として mode（MODE_VCF / MODE_VCT）の勝ち手順を探す"""
+        if self.exhausted:
+            return None
+        try:
+            return self._attack(player, mode, self.max_depth)
+        except _BudgetExceeded:
+            self.exhausted = True
+            return None
+
+    def _tick(self):
+        self.nodes += 1
+        if self.nodes >= self.max_nodes:
+            raise _BudgetExceeded()
+        if self.controller is not None:
+            # 探索の予算のノード数・持ち時間を使い切るか、cancel() されたら
+            # SearchAborted で探索ごと止める（find() では捕まえない）
+            self.controller.tick()
+
+    def _threat_moves(self, player, mode):
+        """四（VCT では活三も）を作る手を強い順に返す"""
+        analyzer = self.analyzer
+        fours = []
+        threes = []
+        if mode == MODE_VCT:
+            moves = analyzer.get_candidate_moves()
+        else:
+            # 四になるマスは差分更新している3石の窓の空きマスだけなので、そこだけ分類する
+            candidates = analyzer._active_candidates()
+            moves = [divmod(idx, analyzer.size) for idx in sorted(analyzer.four_cells(player))
+                     if idx in candidates]
+        for r, c in moves:
+            if analyzer._cells[r * analyzer.size + c] != 0:
+                continue
+            best = 0
+            for d in range(4):
+                cls = analyzer.pattern_class_at(r, c, d, player)
+                if cls > best:
+                    best = cls
+            if best >= PATTERN_DEAD_FOUR:
+                fours.append((-best, r, c))
+            elif mode == MODE_VCT and best == PATTERN_OPEN_THREE:
+                threes.append((r, c))
+        fours.sort()
+        return [(r, c) for _, r, c in fours] + threes
+
+    def _attack(self, attacker, mode, depth):
+        """攻め方の手番。勝ち手順（攻め方の手から始まる）か None を返す"""
+        self._tick()
+        analyzer = self.analyzer
+        defender = 3 - attacker
+
+        wins = analyzer.winning_cells(attacker)
+        if wins:
+            return [wins[0]]
+        if depth == 0:
+            return None
+
+        key = (analyzer.zobrist_key, attacker, mode)
+        cached = self.cache.get(key)
+        if cached is not None and (cached[1] is not None or cached[0] >= depth):
+            return cached[1]
+
+        defender_wins = analyzer.winning_cells(defender)
+        if len(defender_wins) >= 2:
+            result = None
+        elif defender_wins:
+            # 相手の四を止めつつ攻めを続けるしかない
+            result = self._try_block(attacker, mode, depth, defender_wins[0])
+        else:
+            result = None
+            for move in self._threat_moves(attacker, mode):
+                result = self._try_threat(attacker, mode, depth, move)
+                if result:
+                    break
+
+        self.cache[key] = (depth, result)
+        return result
+
+    def _try_block(self, attacker, mode, depth, block):
+        """相手の四を止める手。VCF では止めた手が四になる時だけ攻めが続く"""
+        analyzer = self.analyzer
+        r, c = block
+        if mode == MODE_VCF and not analyzer.winning_cells_after(r, c, attacker):
+            return None
+        analyzer._place(r, c, attacker)
+        try:
+            sub = self._after_threat(attacker, mode, depth, block)
+        finally:
+            analyzer._remove(r, c)
+        return sub
+
+    def _try_threat(self, attacker, mode, depth, move):
+        analyzer = self.analyzer
+        r, c = move
+        analyzer._place(r, c, attacker)
+        try:
+            return self._after_threat(attacker, mode, depth, move)
+        finally:
+            analyzer._remove(r, c)
+
+    def _after_threat(self, attacker, mode, depth, move):
+        """攻め方が move を打った直後（受け方の手番）"""
+        analyzer = self.analyzer
+        defender = 3 - attacker
+        # 受け方に五が打てるなら攻めは失敗
+        if analyzer.winning_cells(defender):
+            return None
+        threats = analyzer.winning_cells(attacker)
+        if len(threats) >= 2:
+            # 活四・四四は止められない（受けが片方を止め、もう片方で五）
+            return [move, threats[0], threats[1]]
+        if threats:
+            responses = threats
+        elif mode == MODE_VCT:
+            responses = self._three_defences(attacker)
+            if not responses:
+                return None
+        else:
+            return None
+
+        line = None
+        for response in responses:
+            self._tick()
+            rr, rc = response
+            analyzer._place(rr, rc, defender)
+            try:
+                sub = self._attack(attacker, mode, depth - 1)
+            finally:
+                analyzer._remove(rr, rc)
+            if sub is None:
+                return None
+            if line is None:
+                line = [move, response] + sub
+        return line
+
+    def _three_defences(self, attacker):
+        """三に対する受け: 攻め方が打てば止められない四になるマスと、受け方の四"""
+        analyzer = self.analyzer
+        defender = 3 - attacker
+        responses = []
+        # 止められない四（五になるマスが2つ）は、四になる窓が2つ以上重なるマスにしかできない
+        # （差分更新している3石の窓から求め、そのマスだけ実際に置いて確かめる）
+        candidates = analyzer._active_candidates()
+        for idx, count in sorted(analyzer.four_cells(attacker).items()):
+            if count < 2 or idx not in candidates:
+                continue
+            r, c = divmod(idx, analyzer.size)
+            if len(analyzer.winning_cells_after(r, c, attacker)) >= 2:
+                responses.append((r, c))
+        # 受け方の四（反撃）も受けとして読む
+        for move in self._threat_moves(defender, MODE_VCF):
+            if move not in responses:
+                responses.append(move)
+        return responses
@@ -0,0 +1,208 @@
+import random
+from array import array
+from multiprocessing import shared_memory
+
+# 境界の種類
+BOUND_EXACT = 0
+BOUND_LOWER = 1
+BOUND_UPPER = 2
+
+# 1エントリ = キー(8バイト) + データ(8バイト)、1バケット2スロット
+ENTRY_BYTES = 16
+BUCKET_SLOTS = 2
+
+# データのビット配置: [63..32]評価値 [31..16]手+1 [15..8]深さ [7..3]世代 [2]有効 [1..0]境界
+_VALID = 1 << 2
+_GENERATION_SHIFT = 3
+GENERATION_MASK = 0x1F
+_SCORE_LIMIT = (1 << 31) - 1
+_MASK64 = (1 << 64) - 1
+
+_zobrist_cache = {}
+
+
+def zobrist_keys(size, seed=20240101):
+    """(石の色, マス) ごとの64ビット乱数と手番の乱数を返す
+
+    プロセスをまたいでも同じ値になるよう固定シードで生成する。
+    """
+    if size not in _zobrist_cache:
+        rng = random.Random(seed + size)
+        cells = size * size
+        stones = [None] + [[rng.getrandbits(64) for _ in range(cells)] for _ in (1, 2)]
+        side = [0, rng.getrandbits(64), rng.getrandbits(64)]
+        _zobrist_cache[size] = (stones, side)
+    return _zobrist_cache[size]
+
+
+def pack_entry(depth, bound, score, move, generation=0):
+    """エントリを64ビット整数1つに詰める（move は盤面上の通し番号か None）"""
+    score = max(-_SCORE_LIMIT, min(_SCORE_LIMIT, int(score)))
+    move_code = 0 if move is None else move + 1
+    return ((score << 32) | (move_code << 16) | (min(depth, 255) << 8)
+            | (generation << _GENERATION_SHIFT) | _VALID | bound)
+
+
+def entry_generation(data):
+    """エントリを書いた探索の世代"""
+    return (data >> _GENERATION_SHIFT) & GENERATION_MASK
+
+
+def _replaceable(data, depth, generation):
+    """深さ優先スロットを置き換えてよいか（空き・前の探索の古いエントリ・より浅い探索）"""
+    return (not data & _VALID or entry_generation(data) != generation
+            or depth >= (data >> 8) & 0xFF)
+
+
+def unpack_entry(data):
+    """pack_entry の逆変換。(depth, bound, score, move)"""
+    move_code = (data >> 16) & 0xFFFF
+    move = None if move_code == 0 else move_code - 1
+    return (data >> 8) & 0xFF, data & 3, data >> 32, move
+
+
+class TranspositionTable:
+    """固定サイズの置換表（深さ優先スロット + 常時置換スロットのバケット方式）"""
+
+    # 他のプロセスと共有しているか（共有中の表の世代は作成したプロセスが進める）
+    shared = False
+
+    def __init__(self, size_mb=4):
+        self.size_mb = size_mb
+        self.bucket_count = max(1, int(size_mb * 1024 * 1024) // (ENTRY_BYTES * BUCKET_SLOTS))
+        self.keys = array('Q', [0]) * (self.bucket_count * BUCKET_SLOTS)
+        self.data = array('q', [0]) * (self.bucket_count * BUCKET_SLOTS)
+        self.hits = 0
+        self.misses = 0
+        self.overwrites = 0
+        self.stores = 0
+        # 探索ごとに進める世代。古い世代のエントリは深さに関係なく置き換える
+        self.generation = 0
+
+    def new_search(self):
+        """次の探索を始める（世代を1つ進める）"""
+        self.generation = (self.generation + 1) & GENERATION_MASK
+
+    def clear(self):
+        """全エントリを消去（統計はそのまま）"""
+        self.keys = array('Q', [0]) * (self.bucket_count * BUCKET_SLOTS)
+        self.data = array('q', [0]) * (self.bucket_count * BUCKET_SLOTS)
+
+    def reset_stats(self):
+        self.hits = 0
+        self.misses = 0
+        self.overwrites = 0
+        self.stores = 0
+
+    def stats(self):
+        """ヒット・ミス・上書きの回数"""
+        probes = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'overwrites': self.overwrites,
+            'stores': self.stores,
+            'hit_rate': self.hits / probes if probes else 0.0,
+            'size_mb': self.size_mb,
+        }
+
+    def probe(self, key):
+        """キーに一致するエントリを (depth, bound, score, move) で返す。無ければ None"""
+        index = (key % self.bucket_count) * BUCKET_SLOTS
+        keys = self.keys
+        data = self.data
+        for slot in (index, index + 1):
+            if keys[slot] == key and data[slot] & _VALID:
+                self.hits += 1
+                return unpack_entry(data[slot])
+        self.misses += 1
+        return None
+
+    def store(self, key, depth, bound, score, move=None):
+        """エントリを保存する
+
+        スロット0は深さ優先（同じ局面か、より深い探索結果か、前の探索で書かれた
+        エントリだけを置き換える）、スロット1は常に置き換える。
+        """
+        index = (key % self.bucket_count) * BUCKET_SLOTS
+        keys = self.keys
+        data = self.data
+        entry = pack_entry(depth, bound, score, move, self.generation)
+        self.stores += 1
+
+        if keys[index] == key or _replaceable(data[index], depth, self.generation):
+            slot = index
+        else:
+            slot = index + 1
+        if data[slot] & _VALID and keys[slot] != key:
+            self.overwrites += 1
+        keys[slot] = key
+        data[slot] = entry
+
+
+class SharedTranspositionTable(TranspositionTable):
+    """multiprocessing.shared_memory 上の置換表（複数プロセスで共有する）
+
+    1スロット = [キー ^ データ, データ] の2ワード。ロックは取らず、読み出し時に
+    キー ^ データ を照合して、別プロセスと書き込みが重なって壊れたエントリを捨てる。
+    name を指定すると作成済みの表に接続する（size_mb は作成時と同じ値を渡すこと）。
+    """
+
+    shared = True
+
+    def __init__(self, size_mb=4, name=None):
+        self.size_mb = size_mb
+        self.bucket_count = max(1, int(size_mb * 1024 * 1024) // (ENTRY_BYTES * BUCKET_SLOTS))
+        nbytes = self.bucket_count * BUCKET_SLOTS * ENTRY_BYTES
+        if name is None:
+            self.shm = shared_memory.SharedMemory(create=True, size=nbytes)
+            self.shm.buf[:nbytes] = bytes(nbytes)
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+        self.owner = name is None
+        self.name = self.shm.name
+        self.words = self.shm.buf[:nbytes].cast('Q')
+        self.reset_stats()
+        # 世代は作成したプロセスが進め、各ワーカーへ配る
+        self.generation = 0
+
+    def clear(self):
+        """全エントリを消去（接続中の全プロセスから見えなくなる）"""
+        self.words[:] = array('Q', [0]) * len(self.words)
+
+    def close(self):
+        """このプロセスからの接続を切る。作成したプロセスは続けて unlink() を呼ぶ"""
+        self.words.release()
+        self.shm.close()
+
+    def unlink(self):
+        self.shm.unlink()
+
+    def probe(self, key):
+        index = (key % self.bucket_count) * BUCKET_SLOTS
+        words = self.words
+        for slot in (index, index + 1):
+            data = words[2 * slot + 1]
+            if data & _VALID and words[2 * slot] ^ data == key:
+                self.hits += 1
+                # 符号なしで保存しているので評価値の符号を戻す
+                return unpack_entry(data - (1 << 64) if data >> 63 else data)
+        self.misses += 1
+        return None
+
+    def store(self, key, depth, bound, score, move=None):
+        index = (key % self.bucket_count) * BUCKET_SLOTS
+        words = self.words
+        entry = pack_entry(depth, bound, score, move, self.generation) & _MASK64
+        self.stores += 1
+
+        old = words[2 * index + 1]
+        if words[2 * index] ^ old == key or _replaceable(old, depth, self.generation):
+            slot = index
+        else:
+            slot = index + 1
+        old = words[2 * slot + 1]
+        if old & _VALID and words[2 * slot] ^ old != key:
+            self.overwrites += 1
+        words[2 * slot] = key ^ entry
+        words[2 * slot + 1] = entry